@@ -1,13 +1,19 @@
 import os
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
+    # Read from the environment once; read-only afterwards
+    model_config = SettingsConfigDict(frozen=True)
+
     # App Config
     APP_TITLE: str = "Phoenix: Laws & Intake Engine"
     
     # Ollama
     OLLAMA_URL: str = "http://localhost:11434"
     DEFAULT_MODEL_NAME: str = os.getenv("PHOENIX_MODEL_NAME", "qwen2.5:14b")
+    OLLAMA_MAX_CONCURRENCY: int = 8  # concurrent contract-clause LLM calls
+    CONTRACT_BATCH_SIZE: int = 1  # clauses per contract-review prompt (1 = one call per clause)
     
     # Email
     SMTP_HOST: str = "smtp-relay.gmail.com"
@@ -21,5 +27,15 @@ class Settings(BaseSettings):
     RAG_DB_PATH: str = os.path.expanduser("~/legal-rag/db")
     RAG_COLLECTION_NAME: str = "legal_corpus"
     USE_RAG_BACKEND: bool = True
+    RAG_EMBED_BACKEND: str = "onnx"  # "onnx" (int8 quantized) or "torch"
+    RAG_ONNX_FILE: str = "model_qint8_avx512_vnni.onnx"
+    PHOENIX_EMBED_INT8: bool = False  # int8-quantize the contract-matching MiniLM (CPU)
+    EMBED_NUM_THREADS: int = 0  # torch intra-op threads for the MiniLM (0 = torch default)
+    PHOENIX_MATCH_INT8: bool = False  # hold cached match embeddings as int8 (4x less memory)
+    EMBED_CACHE_DIR: str = os.path.expanduser("~/.cache/phoenix/embeddings")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -1,19 +1,25 @@
 import os
 import json
+import time
+import asyncio
+from collections import deque
 from ipaddress import ip_address
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 BLOCKLIST_PATH = os.getenv("IP_BLOCKLIST_PATH", "./ip_blocklist.json")
 
 _lock = Lock()
-_blocked = set()  # set[str]
+# Copy-on-write: writers publish a new frozenset under _lock, readers use whatever
+# set is current without locking (rebinding a module global is atomic)
+_blocked: frozenset = frozenset()  # frozenset[str]
 _stats: Dict[str, Dict[str, Any]] = {}  # ip -> {count,last_seen,last_path,last_method,last_status}
-
-
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# Hits are buffered lock-free (deque.append is atomic) and folded into _stats in batches
+_pending: deque = deque()  # (ip, path, method, status, unix_ts)
+_FLUSH_AT = 10_000
+_FLUSH_INTERVAL = 0.25
+_flush_task: Optional[asyncio.Task] = None
 
 
 def normalize_ip(value: str) -> str:
@@ -28,19 +34,18 @@ def load_blocklist() -> None:
             data = json.load(f)
         ips = data.get("blocked_ips", [])
         with _lock:
-            _blocked = {normalize_ip(x) for x in ips}
+            _blocked = frozenset(normalize_ip(x) for x in ips)
     except FileNotFoundError:
         with _lock:
-            _blocked = set()
+            _blocked = frozenset()
     except Exception:
         # If the file is corrupt, fail safe (empty) rather than crash the app
         with _lock:
-            _blocked = set()
+            _blocked = frozenset()
 
 
 def save_blocklist() -> None:
-    with _lock:
-        data = {"blocked_ips": sorted(_blocked)}
+    data = {"blocked_ips": sorted(_blocked)}
     tmp = BLOCKLIST_PATH + ".tmp"
     with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
@@ -48,52 +53,85 @@ def save_blocklist() -> None:
 
 
 def is_blocked(ip: str) -> bool:
-    with _lock:
-        return ip in _blocked
+    return ip in _blocked
 
 
 def block_ip(ip: str) -> None:
+    global _blocked
     ip = normalize_ip(ip)
     with _lock:
-        _blocked.add(ip)
+        _blocked = _blocked | {ip}
     save_blocklist()
 
 
 def unblock_ip(ip: str) -> None:
+    global _blocked
     ip = normalize_ip(ip)
     with _lock:
-        _blocked.discard(ip)
+        _blocked = _blocked - {ip}
     save_blocklist()
 
 
 def blocked_list() -> List[str]:
-    with _lock:
-        return sorted(_blocked)
+    return sorted(_blocked)
 
 
 def record_hit(ip: str, path: str, method: str, status: int) -> None:
-    path = (path or "")[:300]
-    method = (method or "")[:16]
+    _pending.append((ip, (path or "")[:300], (method or "")[:16], status, time.time()))
+    if len(_pending) >= _FLUSH_AT:
+        flush_hits()
+
 
+def flush_hits() -> None:
+    """Applies buffered hits to _stats."""
+    seen: Dict[str, float] = {}
     with _lock:
-        d = _stats.setdefault(
-            ip,
-            {
-                "count": 0,
-                "last_seen": None,
-                "last_path": None,
-                "last_method": None,
-                "last_status": None,
-            },
-        )
-        d["count"] += 1
-        d["last_seen"] = _now_iso()
-        d["last_path"] = path
-        d["last_method"] = method
-        d["last_status"] = status
+        while _pending:
+            ip, path, method, status, ts = _pending.popleft()
+            seen[ip] = ts
+            d = _stats.setdefault(
+                ip,
+                {
+                    "count": 0,
+                    "last_seen": None,
+                    "last_path": None,
+                    "last_method": None,
+                    "last_status": None,
+                },
+            )
+            d["count"] += 1
+            d["last_path"] = path
+            d["last_method"] = method
+            d["last_status"] = status
+        # Timestamps are formatted once per IP per batch rather than once per hit
+        for ip, ts in seen.items():
+            _stats[ip]["last_seen"] = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(_FLUSH_INTERVAL)
+        flush_hits()
+
+
+def start_hit_flusher() -> None:
+    """Starts the periodic flush on the running loop (idempotent)."""
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+
+
+def stop_hit_flusher() -> None:
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    flush_hits()
 
 
 def top_ips(limit: int = 50) -> List[Tuple[str, Dict[str, Any]]]:
+    # The admin view reads straight after a flush, so it is never stale
+    flush_hits()
     with _lock:
         items = list(_stats.items())
     items.sort(key=lambda kv: kv[1].get("count", 0), reverse=True)
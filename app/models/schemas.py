@@ -24,6 +24,18 @@ class IntakeRequest(BaseModel):
     max_categories: int = 5
     notify_email: Optional[str] = None
     team_profile: Optional[Dict[str, Any]] = None
+    team_profile_hash: Optional[str] = None  # sent instead of team_profile once the server has it
+
+class IntakeModelOutput(BaseModel):
+    """Shape the intake LLM must emit; passed to Ollama as a JSON schema."""
+    categories: List[str]
+    priority_label: str
+    priority_score: float
+    summary: str
+    csuite_mentions: List[CsuiteHit] = []
+    suggested_owner: Optional[str] = None
+    suggested_next_steps: Optional[str] = None
+    learning_opportunities: List[str] = []
 
 class IntakeResponse(BaseModel):
     categories: List[str]
@@ -40,6 +52,7 @@ class IntakeResponse(BaseModel):
     original_text: Optional[str] = None
     raw_model_output: str
     email_status: Optional[str] = None
+    team_profile_hash: Optional[str] = None
 
 class ContractRedlineRequest(BaseModel):
     counterparty_text: str
@@ -1,4 +1,6 @@
 import os
+import hmac
+from html import escape
 from fastapi import APIRouter, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 
@@ -12,7 +14,7 @@ ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 def require_admin(request: Request) -> None:
     # Prefer header auth; allow ?token= for quick testing (remove if you want stricter)
     token = request.headers.get("x-admin-token") or request.query_params.get("token")
-    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+    if not ADMIN_TOKEN or not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
@@ -23,15 +25,17 @@ async def admin_ips(request: Request):
     blocked = blocked_list()
     top = top_ips(limit=100)
 
+    # IPs (X-Forwarded-For) and paths come straight from clients: escape everything
     rows = []
     for ip, data in top:
+        ip = escape(ip)
         rows.append(f"""
           <tr>
             <td style="font-family:monospace">{ip}</td>
             <td>{data.get("count", 0)}</td>
-            <td style="font-family:monospace">{data.get("last_seen","")}</td>
-            <td style="font-family:monospace">{data.get("last_method","")} {data.get("last_path","")}</td>
-            <td>{data.get("last_status","")}</td>
+            <td style="font-family:monospace">{escape(str(data.get("last_seen") or ""))}</td>
+            <td style="font-family:monospace">{escape(data.get("last_method") or "")} {escape(data.get("last_path") or "")}</td>
+            <td>{escape(str(data.get("last_status") or ""))}</td>
             <td>
               <form method="post" action="/admin/block" style="display:inline">
                 <input type="hidden" name="ip" value="{ip}">
@@ -45,7 +49,7 @@ async def admin_ips(request: Request):
           </tr>
         """)
 
-    blocked_html = "".join([f"<li style='font-family:monospace'>{ip}</li>" for ip in blocked]) or "<li>(none)</li>"
+    blocked_html = "".join([f"<li style='font-family:monospace'>{escape(ip)}</li>" for ip in blocked]) or "<li>(none)</li>"
 
     html = f"""
     <!doctype html>
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import os
+import hmac
+from html import escape
+from urllib.parse import quote
 from fastapi import APIRouter, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 
@@ -29,7 +32,7 @@ def _require_local_admin(request: Request) -> None:
         raise HTTPException(status_code=404, detail="Not found")
 
     token = request.headers.get("x-admin-token") or request.query_params.get("token")
-    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+    if not ADMIN_TOKEN or not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
@@ -38,7 +41,7 @@ async def admin_ips(request: Request):
     _require_local_admin(request)
 
     token = request.query_params.get("token", "")
-    qs = f"?token={token}" if token else ""
+    qs = escape(f"?token={quote(token)}") if token else ""
 
     blocked = blocked_list()
     top = top_ips(limit=200)
@@ -46,9 +49,9 @@ async def admin_ips(request: Request):
     blocked_chips = "".join(
         f"""
         <div class="chip">
-          <span class="mono">{ip}</span>
+          <span class="mono">{escape(ip)}</span>
           <form method="post" action="/admin/unblock{qs}" style="display:inline;margin-left:8px;">
-            <input type="hidden" name="ip" value="{ip}">
+            <input type="hidden" name="ip" value="{escape(ip)}">
             <button class="btn-flat waves-effect waves-teal" type="submit" title="Unblock" style="padding:0 6px;">
               <i class="material-icons" style="font-size:18px; line-height: 32px;">close</i>
             </button>
@@ -58,12 +61,14 @@ async def admin_ips(request: Request):
         for ip in blocked
     ) or "<div class='grey-text'>No blocked IPs yet.</div>"
 
+    # IPs (X-Forwarded-For) and paths come straight from clients: escape everything
     rows = []
     for ip, data in top:
-        last_seen = data.get("last_seen", "") or ""
-        last_req = f"{data.get('last_method','')} {data.get('last_path','')}".strip()
+        ip = escape(ip)
+        last_seen = escape(str(data.get("last_seen") or ""))
+        last_req = escape(f"{data.get('last_method') or ''} {data.get('last_path') or ''}".strip())
         count = data.get("count", 0)
-        status = data.get("last_status", "")
+        status = escape(str(data.get("last_status") or ""))
 
         rows.append(f"""
           <tr>
@@ -333,7 +338,7 @@ async def admin_block(request: Request, ip: str = Form(...)):
     block_ip(ip)
 
     token = request.query_params.get("token", "")
-    url = f"/admin/ips?token={token}" if token else "/admin/ips"
+    url = f"/admin/ips?token={quote(token)}" if token else "/admin/ips"
     return RedirectResponse(url=url, status_code=303)
 
 
@@ -343,5 +348,5 @@ async def admin_unblock(request: Request, ip: str = Form(...)):
     unblock_ip(ip)
 
     token = request.query_params.get("token", "")
-    url = f"/admin/ips?token={token}" if token else "/admin/ips"
+    url = f"/admin/ips?token={quote(token)}" if token else "/admin/ips"
     return RedirectResponse(url=url, status_code=303)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import Optional
-import base64
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import io
-from docx import Document
-from docx.shared import RGBColor
+import orjson
+import tempfile
+
+# Optional Imports handling: pybase64 is a SIMD drop-in for the stdlib codec
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
 
 # Import Schemas
 from app.models.schemas import (
@@ -19,18 +27,43 @@ from app.services.contracts import (
     analyze_contract_logic, 
     get_personas, 
     upsert_persona, 
-    delete_persona
+    delete_persona,
+    generate_analysis_report_docx
 )
 
 from app.utils.file_parsing import extract_docx_text
-from app.utils.redline_apply import apply_redlines_to_docx
 
 router = APIRouter()
 
+# python-docx work is CPU-bound; keep it off the event loop
+_DOCX_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Exports up to this size stay in memory; larger ones spill to a temp file
+_SPOOL_MAX = 8 * 1024 * 1024
+_STREAM_CHUNK = 64 * 1024
+
+def _iter_file(f, chunk_size: int = _STREAM_CHUNK):
+    """Yields a file in fixed-size chunks and closes it once fully sent."""
+    try:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk: break
+            yield chunk
+    finally:
+        f.close()
+
 # --- Persona Management ---
 @router.get("/personas")
-async def get_contract_personas():
-    return get_personas()
+async def get_contract_personas(request: Request):
+    # The contracts page preloads this during HTML parse; no-cache + ETag lets the
+    # later reloads (after save/delete) revalidate cheaply instead of going stale.
+    body = orjson.dumps(get_personas())
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/personas")
 async def upsert_contract_persona(req: PersonaUpdateRequest):
@@ -49,15 +82,16 @@ async def upload_contracts(counterparty: UploadFile = File(...), template: Uploa
     Parses .docx files into text for the frontend editor.
     """
     try:
+        loop = asyncio.get_running_loop()
         cp_bytes = await counterparty.read()
         tp_text = None
         if template:
             tp_bytes = await template.read()
-            tp_text = extract_docx_text(tp_bytes)
+            tp_text = await loop.run_in_executor(_DOCX_POOL, extract_docx_text, tp_bytes)
         
         return {
             "status": "ok", 
-            "counterparty_text": extract_docx_text(cp_bytes), 
+            "counterparty_text": await loop.run_in_executor(_DOCX_POOL, extract_docx_text, cp_bytes), 
             "template_text": tp_text
         }
     except Exception as e:
@@ -86,12 +120,21 @@ async def export_redline(req: ContractRedlineExportRequest):
     """
     Generates the actual .docx file with Track Changes applied.
     """
+    # Deferred: python-docx/lxml are only needed once someone exports
+    from app.utils.redline_apply import apply_redlines_to_docx
+
     try:
-        orig = base64.b64decode(req.original_docx_base64)
-        res = apply_redlines_to_docx(orig, req.diff)
+        # Multi-MB payloads: decode in a worker thread, not on the event loop
+        orig = await asyncio.to_thread(b64decode, req.original_docx_base64)
+        buf = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+        try:
+            await asyncio.get_running_loop().run_in_executor(_DOCX_POOL, apply_redlines_to_docx, orig, req.diff, buf)
+        except Exception:
+            buf.close()
+            raise
         
         return StreamingResponse(
-            io.BytesIO(res), 
+            _iter_file(buf), 
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", 
             headers={"Content-Disposition": "attachment; filename=redlined.docx"}
         )
@@ -104,48 +147,10 @@ async def export_report(req: ContractReportRequest):
     Simple summary report generation.
     """
     try:
-        doc = Document()
-        doc.add_heading('Phoenix Analysis Report', 0)
-        
-        for i, item in enumerate(req.diff, 1):
-            # Extract data safely
-            clause_name = item.get("clause_name", f"Clause {i}")
-            cp_text = item.get("original_text", "") or item.get("cp_text", "")
-            
-            # Handle flattened or nested delta structure
-            delta = item.get("delta", item)
-            risk_score = item.get("risk_score") or delta.get("risk_score", "N/A")
-
-            # 1. Heading
-            doc.add_heading(clause_name, level=2)
-            
-            # 2. Original Text (Italic)
-            p_text = doc.add_paragraph()
-            run_text = p_text.add_run(f"Original Text: \"{cp_text[:200]}...\"")
-            run_text.italic = True
-            
-            # 3. Risk Score (Bold) - FIXED LINE
-            # Instead of style='Strong', we use a normal paragraph and bold the run manually
-            p_risk = doc.add_paragraph()
-            run_risk = p_risk.add_run(f"Risk Score: {risk_score}/10")
-            run_risk.bold = True
-            run_risk.font.color.rgb = RGBColor(200, 0, 0) if str(risk_score) > "5" else RGBColor(0, 0, 0)
-                 
-            # 4. Comments / Reasoning
-            reasoning = delta.get("reasoning", "")
-            if reasoning:
-                doc.add_paragraph(f"Reasoning: {reasoning}")
-
-            if delta.get("comments"):
-                for c in delta["comments"]: 
-                    doc.add_paragraph(c, style='List Bullet')
-            
-            doc.add_paragraph("_" * 50) # Separator
-
-        buf = io.BytesIO()
-        doc.save(buf)
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(_DOCX_POOL, generate_analysis_report_docx, req.diff)
         return StreamingResponse(
-            io.BytesIO(buf.getvalue()), 
+            io.BytesIO(data), 
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             headers={"Content-Disposition": "attachment; filename=Analysis_Report.docx"}
         )
@@ -1,25 +1,51 @@
-from fastapi import APIRouter
-from typing import List, Any
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from functools import lru_cache
+from typing import List, Any, Tuple
 from app.models.schemas import IntakeRequest, IntakeResponse, CsuiteHit
 from app.services.intake import (
     build_intake_prompt, 
     _safe_parse_intake_json, 
     assign_team_owner, 
-    send_intake_email
+    queue_intake_email,
+    remember_team_profile,
+    lookup_team_profile,
+    INTAKE_JSON_SCHEMA
 )
 from app.utils.llm_client import call_ollama_generate
+from app.utils.keyword_matcher import watchlist_matcher
 from app.core.config import settings
 
 router = APIRouter()
 
+# Model label synonyms -> canonical priority label (matches the UI's p-* classes)
+_PRIORITY_MAP = {
+    "critical": "Critical", "urgent": "Critical", "emergency": "Critical",
+    "high": "High",
+    "medium": "Medium", "normal": "Medium", "standard": "Medium", "moderate": "Medium",
+    "low": "Low", "routine": "Low",
+}
+
+@lru_cache(maxsize=256)
+def _normalize_names(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Lowercased, trimmed watchlist; a team resubmits the same list with every email."""
+    return tuple(n for n in (w.lower().strip() for w in names) if n)
+
+def _as_str_list(value: Any) -> List[str]:
+    """Model field that may be a scalar or a list -> list of strings, in one pass."""
+    if not value: return []
+    return list(map(str, value if isinstance(value, list) else (value,)))
+
 def _build_intake_response(parsed: dict, raw: str, orig: str, watchlist: list) -> IntakeResponse:
     """
     Sanitizes LLM output into a strict Pydantic model.
     Handles type mismatches (list vs string) and validation logic.
     """
     # 1. Handle Categories (ensure list of strings)
-    cats = parsed.get("categories", [])
-    if isinstance(cats, str): cats = [cats]
+    # Model output is untrusted: anything other than a list of strings is stringified
+    cats = parsed.get("categories") or []
+    if not isinstance(cats, list): cats = [cats]
+    cats = [str(c) for c in cats if c is not None]
     
     # 2. Handle Priority Score (ensure float)
     p_score = parsed.get("priority_score", 5.0)
@@ -29,9 +55,11 @@ def _build_intake_response(parsed: dict, raw: str, orig: str, watchlist: list) -
         p_score = 5.0
 
     # 3. Handle Priority Label (Sanitize "High|Medium|Low" artifacts)
-    raw_label = parsed.get("priority_label", "Medium")
-    if "|" in raw_label or len(raw_label) > 20:
-        # Fallback based on score if label is messy
+    raw_label = str(parsed.get("priority_label") or "Medium").strip().lower()
+    first_token = raw_label.split()[0] if raw_label else ""
+    p_lbl = _PRIORITY_MAP.get(first_token)
+    if p_lbl is None:
+        # Fallback based on score if label is messy or unknown
         if p_score >= 9:
             p_lbl = "Critical"
         elif p_score >= 7:
@@ -40,8 +68,6 @@ def _build_intake_response(parsed: dict, raw: str, orig: str, watchlist: list) -
             p_lbl = "Medium"
         else:
             p_lbl = "Low"
-    else:
-        p_lbl = raw_label
     
     # 4. Handle Suggested Next Steps (Fix list->string crash)
     steps_raw = parsed.get("suggested_next_steps")
@@ -56,34 +82,54 @@ def _build_intake_response(parsed: dict, raw: str, orig: str, watchlist: list) -
     csuite = []
     if watchlist:
         raw_hits = parsed.get("csuite_mentions", [])
-        wl = [w.lower() for w in watchlist]
+        wl = _normalize_names(tuple(watchlist))
+        # watchlist term inside name: one multi-pattern scan per name
+        matcher = watchlist_matcher(wl)
+        # name inside a watchlist term: one substring search over the joined list
+        wl_joined = "\x00".join(wl)
         for hit in raw_hits:
             # Handle if hit is a dict or string
             if isinstance(hit, dict):
-                name = hit.get("name", "")
+                name = str(hit.get("name") or "")
+                variants = _as_str_list(hit.get("matched_variants")) or [name]
+                contexts = _as_str_list(hit.get("contexts"))
             else:
                 name = str(hit)
+                variants, contexts = [name], []
                 
-            if any(w in name.lower() or name.lower() in w for w in wl):
-                csuite.append(CsuiteHit(name=name, matched_variants=[name]))
+            name_lower = name.lower().replace("\x00", "")
+            if name_lower and (matcher.contains_any(name_lower) or name_lower in wl_joined):
+                csuite.append(CsuiteHit(name=name, matched_variants=variants, contexts=contexts))
+
+    owner_raw = parsed.get("suggested_owner")
 
     return IntakeResponse(
-        categories=[str(c) for c in cats],
+        categories=cats,
         priority_label=p_lbl, 
         priority_score=p_score,
-        summary=parsed.get("summary", ""),
+        summary=str(parsed.get("summary") or ""),
         csuite_mentions=csuite,
-        suggested_owner=parsed.get("suggested_owner"),
+        suggested_owner=str(owner_raw) if owner_raw is not None else None,
         suggested_next_steps=suggested_steps,       # Sanitized string
-        learning_opportunities=parsed.get("learning_opportunities", []), # New field
+        learning_opportunities=_as_str_list(parsed.get("learning_opportunities")), # New field
         raw_model_output=raw,
         original_text=orig
     )
 
 @router.post("/analyze")
 async def intake_analyze(req: IntakeRequest):
+    # 0. Resolve the team profile (full body, or the hash of one uploaded earlier)
+    team_profile, profile_hash = req.team_profile, None
+    if team_profile:
+        profile_hash = remember_team_profile(team_profile)
+    elif req.team_profile_hash:
+        team_profile = lookup_team_profile(req.team_profile_hash)
+        if team_profile is None:
+            raise HTTPException(status_code=409, detail="Unknown team_profile_hash; resend team_profile")
+        profile_hash = req.team_profile_hash
+
     # 1. Generate Analysis with LLM
-    raw = await call_ollama_generate(settings.DEFAULT_MODEL_NAME, build_intake_prompt(req), json_mode=True)
+    raw = await call_ollama_generate(settings.DEFAULT_MODEL_NAME, build_intake_prompt(req), json_mode=True, json_schema=INTAKE_JSON_SCHEMA, num_predict=1024, cache=True)
     
     # 2. Parse JSON safely
     parsed = _safe_parse_intake_json(raw)
@@ -92,10 +138,12 @@ async def intake_analyze(req: IntakeRequest):
     res = _build_intake_response(parsed, raw, req.email_text, req.csuite_names)
     
     # 4. Assign Team Owner (Skills & Playbook)
-    res = assign_team_owner(res, req.team_profile)
+    res = assign_team_owner(res, team_profile, profile_hash)
+    res.team_profile_hash = profile_hash
     
-    # 5. Send Notification (Optional)
+    # 5. Send Notification (Optional; delivered in the background)
     if req.notify_email:
-        res.email_status = send_intake_email(req.notify_email, res, req.email_text)
-        
-    return res
\ No newline at end of file
+        res.email_status = queue_intake_email(req.notify_email, res, req.email_text)
+
+    # Serialize in pydantic-core (Rust) rather than walking the model through jsonable_encoder
+    return Response(content=res.model_dump_json(), media_type="application/json")
\ No newline at end of file
@@ -1,23 +1,89 @@
-from fastapi import APIRouter
+import asyncio
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from app.models.schemas import QueryRequest
-from app.services.legal_rag import get_rag_context_for_persona, PERSONAS, build_prompt
-from app.utils.llm_client import call_ollama_generate
+from app.services.legal_rag import get_rag_context_for_persona, embed_query, PERSONAS, build_prompt
+from app.utils.llm_client import call_ollama_generate, stream_ollama_generate
 
 router = APIRouter()
 
+_PERSONA_KEYS = frozenset(PERSONAS)
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def _stream_answers(requested: list, prompts: list, sources: list):
+    """
+    Server-Sent Events: a 'sources' event (with the persona labels, in request order),
+    then 'token' events from all personas interleaved as they arrive,
+    a 'persona_done' per persona, and a final 'done'.
+    """
+    personas = [{"persona": pid, "label": PERSONAS[pid]["label"]} for pid in requested]
+    yield _sse("sources", {"sources": sources, "used_rag": bool(sources), "personas": personas})
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(pid: str, prompt: str):
+        try:
+            async for token in stream_ollama_generate(PERSONAS[pid]["model"], prompt, num_predict=1024):
+                await queue.put(("token", {"persona": pid, "token": token}))
+        except Exception as e:
+            await queue.put(("error", {"persona": pid, "detail": str(e)}))
+        finally:
+            await queue.put(("persona_done", {"persona": pid, "label": PERSONAS[pid]["label"]}))
+
+    tasks = [asyncio.create_task(pump(pid, prompt)) for pid, prompt in zip(requested, prompts)]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            event, data = await queue.get()
+            if event == "persona_done": remaining -= 1
+            yield _sse(event, data)
+    finally:
+        # Client disconnected mid-stream: stop generating
+        for t in tasks: t.cancel()
+
+    yield _sse("done", {})
+
 @router.post("/query")
-async def legal_query(req: QueryRequest):
-    requested = req.personas or ["mi"]
+async def legal_query(req: QueryRequest, request: Request):
+    # Unknown persona ids would KeyError further down; drop them
+    requested = [p for p in (req.personas or ()) if p in _PERSONA_KEYS] or ["mi"]
     answers = []
     used_rag = False
     all_sources = []
+    streaming = "text/event-stream" in request.headers.get("accept", "")
     
     if req.use_rag:
-        for pid in requested:
-            ctx, srcs = get_rag_context_for_persona(req.question, pid)
+        # Embed the question once and reuse it for every persona's retrieval.
+        # Embedding and Chroma queries are blocking, so run them in worker threads.
+        q_vec = await asyncio.to_thread(embed_query, req.question)
+        retrievals = await asyncio.gather(*[
+            asyncio.to_thread(get_rag_context_for_persona, req.question, pid, 5, q_vec)
+            for pid in requested
+        ])
+        prompts = []
+        for pid, (ctx, srcs) in zip(requested, retrievals):
             all_sources.extend(srcs)
-            ans = await call_ollama_generate(PERSONAS[pid]["model"], build_prompt(pid, req.question, ctx))
+            prompts.append(build_prompt(pid, req.question, ctx))
+
+        # Same statute cited by several chunks: list it once, in first-seen order
+        all_sources = list({(s["source"], s["jurisdiction"], s["title"]): s for s in all_sources}.values())
+
+        if streaming:
+            return StreamingResponse(_stream_answers(requested, prompts, all_sources), media_type="text/event-stream")
+
+        # Fan out to Ollama so multi-persona queries cost max(persona) instead of sum(persona)
+        tasks = [call_ollama_generate(PERSONAS[pid]["model"], prompt, num_predict=1024, cache=True) for pid, prompt in zip(requested, prompts)]
+        # One failed persona shouldn't discard the others' answers
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for pid, ans in zip(requested, results):
+            if isinstance(ans, Exception):
+                ans = f"(Error: {ans})"
             answers.append({"persona": pid, "label": PERSONAS[pid]["label"], "answer": ans})
         if all_sources: used_rag = True
             
-    return {"answers": answers, "used_rag": used_rag, "sources": all_sources}
\ No newline at end of file
+    # Plain dicts/strings: hand straight to orjson, skipping jsonable_encoder's walk
+    return ORJSONResponse({"answers": answers, "used_rag": used_rag, "sources": all_sources})
\ No newline at end of file
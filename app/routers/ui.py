@@ -1,18 +1,79 @@
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse
+import gzip
+import hashlib
+from pathlib import Path
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from app.ui.templates import HTML_MAIN, HTML_INTAKE, HTML_CONTRACTS, HTML_MAPPER
 
 router = APIRouter()
 
+_STATIC_DIR = Path(__file__).resolve().parent.parent / "ui" / "static"
+_MEDIA_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+
+def _accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+class _Page:
+    """
+    A UI page or asset encoded once at import, with a content ETag for conditional GETs.
+    The gzip variant is compressed here too (level 9, once) rather than per request.
+    """
+    def __init__(self, content: str, media_type: str = "text/html; charset=utf-8", cache_control: str = "public, max-age=300"):
+        self.body = content.encode("utf-8")
+        self.gz_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.media_type = media_type
+        self.digest = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.etag = f'"{self.digest}"'
+        self.gz_etag = f'"{self.digest}-gz"'
+        self.headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        self.gz_headers = {**self.headers, "ETag": self.gz_etag, "Content-Encoding": "gzip"}
+
+    def respond(self, request: Request) -> Response:
+        if _accepts_gzip(request):
+            body, etag, headers = self.gz_body, self.gz_etag, self.gz_headers
+        else:
+            body, etag, headers = self.body, self.etag, self.headers
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={**self.headers, "ETag": etag})
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+# CSS/JS split out of the page shells. URLs carry the content hash, so assets can be
+# cached for a year and a changed file is picked up with the next shell.
+_ASSETS = {
+    f.name: _Page(f.read_text(encoding="utf-8"), _MEDIA_TYPES[f.suffix], "public, max-age=31536000, immutable")
+    for f in sorted(_STATIC_DIR.iterdir()) if f.suffix in _MEDIA_TYPES
+}
+
+def _shell(html: str) -> _Page:
+    for name, asset in _ASSETS.items():
+        html = html.replace(f'"/static/{name}"', f'"/static/{name}?v={asset.digest}"')
+    return _Page(html)
+
+_MAIN = _shell(HTML_MAIN)
+_INTAKE = _shell(HTML_INTAKE)
+_CONTRACTS = _shell(HTML_CONTRACTS)
+_MAPPER = _shell(HTML_MAPPER)
+
 @router.get("/", response_class=HTMLResponse)
 @router.get("/ui", response_class=HTMLResponse)
-async def ui_main(): return HTML_MAIN
+async def ui_main(request: Request): return _MAIN.respond(request)
 
 @router.get("/ui/intake", response_class=HTMLResponse)
-async def ui_intake(): return HTML_INTAKE
+async def ui_intake(request: Request): return _INTAKE.respond(request)
 
 @router.get("/ui/contracts", response_class=HTMLResponse)
-async def ui_contracts(): return HTML_CONTRACTS
+async def ui_contracts(request: Request): return _CONTRACTS.respond(request)
 
 @router.get("/ui/mapper", response_class=HTMLResponse)
-async def ui_mapper(): return HTML_MAPPER
\ No newline at end of file
+async def ui_mapper(request: Request): return _MAPPER.respond(request)
+
+@router.get("/static/{name}", include_in_schema=False)
+async def ui_static(name: str, request: Request):
+    asset = _ASSETS.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404)
+    return asset.respond(request)
@@ -1,14 +1,27 @@
-import json
-import re
+import copy
+import orjson
 import asyncio
 import difflib
+import hashlib
+import io
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 
 # --- Imports from Core/Utils ---
 from app.core.config import settings
 from app.core.north_star_config import GLOBAL_GUIDANCE
-from app.utils.llm_client import call_ollama_generate
-from app.utils.semantic_matcher import extract_paragraphs, find_best_match_in_library
+from app.utils.llm_client import call_ollama_generate, extract_json_object
+from app.utils.semantic_matcher import extract_paragraphs, find_best_match_in_library, paragraph_hash
+from app.utils.file_parsing import get_docx_document
+from app.utils.keyword_matcher import KeywordMatcher
+
+# Clause analyses in flight at once, across all requests; match OLLAMA_NUM_PARALLEL
+_LLM_SEM = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENCY)
+
+# Parsed (ungrounded) deltas by clause content + persona + clause type: boilerplate
+# clauses recur across documents, and a rerun of the same clause skips the model
+_DELTA_CACHE_MAX = 4096
+_DELTA_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
 # ---------------------------------------------------------
 # 1. THE PLAYBOOK (Config & Standards)
@@ -50,6 +63,12 @@ PLAYBOOK_KEYWORDS = {
     "Warranties": ["warranties", "disclaimer", "representations"]
 }
 
+# All anchor keywords in one automaton; payload = playbook position of the clause type
+_ANCHOR_TYPES = list(PLAYBOOK_KEYWORDS)
+_ANCHOR_MATCHER = KeywordMatcher({
+    k: i for i, kws in reversed(list(enumerate(PLAYBOOK_KEYWORDS.values()))) for k in kws
+})
+
 FEW_SHOT_EXAMPLES = """
 Example (Indemnification):
 Input Clause: "Supplier shall indemnify Customer for everything."
@@ -72,12 +91,9 @@ def _is_noise(text: str) -> bool:
     return False
 
 def check_keyword_anchor(text: str) -> Optional[str]:
-    text_lower = text.lower()
-    for clause_type, keywords in PLAYBOOK_KEYWORDS.items():
-        for k in keywords:
-            if k in text_lower:
-                return clause_type
-    return None
+    # Single pass over the text; ties go to the earliest clause type in the playbook
+    hits = _ANCHOR_MATCHER.payloads(text.lower())
+    return _ANCHOR_TYPES[min(hits)] if hits else None
 
 def stitch_paragraphs(paragraphs: List[str]) -> List[str]:
     stitched = []
@@ -167,15 +183,85 @@ Return a valid JSON object only.
 Your Output:
 """
 
+def build_batch_prompt(items: List[Dict[str, Any]], instructions: str) -> str:
+    """
+    Several queued clauses in one prompt, so the strategy, guidance and examples
+    are sent (and prefilled) once per batch instead of once per clause.
+    """
+    clauses = "".join(
+        f"### CLAUSE {i}\n"
+        f"Clause Type: {item['label']}\n"
+        f"Standard Playbook Version: \"{item['tp_text']}\"\n"
+        f"Counterparty Version: \"{item['cp_text']}\"\n\n"
+        for i, item in enumerate(items)
+    )
+    return f"""
+You are an expert Legal AI Agent.
+**TASK**: Review EACH numbered "Counterparty Clause" below against its "Standard Playbook Provision".
+**STRATEGY**: {instructions}
+
+**OBJECTIVE** (for every clause independently):
+1. Detect if the Counterparty Clause deviates from our Standard Playbook.
+2. If risky, provide a Redline (Search & Replace) to align it with the Standard.
+3. Ignore minor wording differences if the legal effect is the same.
+
+**CLAUSES**:
+{clauses}
+{GLOBAL_GUIDANCE}
+
+**RESPONSE FORMAT**:
+Return a valid JSON object only: {{"results": [...]}} with exactly one entry per clause.
+Each entry has "idx" (the CLAUSE number) plus the fields shown in this single-clause example:
+{FEW_SHOT_EXAMPLES}
+
+Your Output:
+"""
+
+def parse_batch_delta_json(raw_output: str, count: int) -> Optional[List[Dict[str, Any]]]:
+    """Per-clause deltas in CLAUSE order, or None unless every clause came back."""
+    results = parse_delta_json(raw_output).get("results")
+    if not isinstance(results, list):
+        return None
+    by_idx = {r["idx"]: r for r in results if isinstance(r, dict) and isinstance(r.get("idx"), int)}
+    if any(i not in by_idx for i in range(count)):
+        return None
+    return [by_idx[i] for i in range(count)]
+
 def parse_delta_json(raw_output: str) -> Dict[str, Any]:
+    # json_mode output is normally bare JSON; otherwise take the first balanced
+    # object (this also skips ```json fences and any chatter around them)
     try:
-        if "```json" in raw_output:
-            raw_output = raw_output.split("```json")[1].split("```")[0]
-        elif "```" in raw_output:
-             raw_output = raw_output.split("```")[1].split("```")[0]
-        return json.loads(raw_output)
-    except:
-        return {"risk_score": 0, "reasoning": "Parse Error", "replacements": [], "comments": []}
+        data = orjson.loads(raw_output)
+    except orjson.JSONDecodeError:
+        data = None
+        obj = extract_json_object(raw_output)
+        if obj:
+            try:
+                data = orjson.loads(obj)
+            except orjson.JSONDecodeError:
+                pass
+    if isinstance(data, dict):
+        return data
+    return {"risk_score": 0, "reasoning": "Parse Error", "replacements": [], "comments": []}
+
+def _delta_key(item: Dict[str, Any], persona_sig: str) -> str:
+    raw = f"{settings.DEFAULT_MODEL_NAME}|{persona_sig}|{item['label']}|{paragraph_hash(item['cp_text'])}|{paragraph_hash(item['tp_text'])}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def _cached_delta(key: str) -> Optional[Dict[str, Any]]:
+    hit = _DELTA_CACHE.get(key)
+    if hit is None:
+        return None
+    _DELTA_CACHE.move_to_end(key)
+    # Grounding edits the delta in place; hand out a copy
+    return copy.deepcopy(hit)
+
+def _remember_delta(key: str, delta: Dict[str, Any]) -> None:
+    if delta.get("reasoning") == "Parse Error":
+        return
+    _DELTA_CACHE[key] = copy.deepcopy(delta)
+    if len(_DELTA_CACHE) > _DELTA_CACHE_MAX:
+        _DELTA_CACHE.popitem(last=False)
 
 # ---------------------------------------------------------
 # 4. Exports
@@ -191,6 +277,94 @@ def delete_persona(name: str):
     if name in CONTRACT_PERSONAS:
         del CONTRACT_PERSONAS[name]
 
+def _report_paragraph(text: str, style: Optional[str] = None, bold: bool = False, italic: bool = False, color: Optional[str] = None):
+    """Builds a <w:p> with a single run directly, skipping python-docx's per-call proxies."""
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    p = OxmlElement("w:p")
+    if style:
+        pPr = OxmlElement("w:pPr")
+        p_style = OxmlElement("w:pStyle")
+        p_style.set(qn("w:val"), style)
+        pPr.append(p_style)
+        p.append(pPr)
+
+    run = OxmlElement("w:r")
+    if bold or italic or color:
+        rPr = OxmlElement("w:rPr")
+        if bold: rPr.append(OxmlElement("w:b"))
+        if italic: rPr.append(OxmlElement("w:i"))
+        if color:
+            c = OxmlElement("w:color")
+            c.set(qn("w:val"), color)
+            rPr.append(c)
+        run.append(rPr)
+
+    t = OxmlElement("w:t")
+    t.set(qn("xml:space"), "preserve")
+    t.text = text
+    run.append(t)
+    p.append(run)
+    return p
+
+def generate_analysis_report_docx(diff: List[Dict[str, Any]]) -> bytes:
+    """
+    Simple summary report generation. CPU-bound; routers run it off the event loop.
+    Only the title uses the high-level API; clause paragraphs are built as raw XML.
+    """
+    Document = get_docx_document()
+    if Document is None: raise ImportError("python-docx missing")
+    from docx.oxml.ns import qn
+
+    doc = Document()
+    doc.add_heading('Phoenix Analysis Report', 0)
+
+    # New paragraphs must sit before the trailing section properties
+    body = doc.element.body
+    sect_pr = body.find(qn("w:sectPr"))
+    insert = sect_pr.addprevious if sect_pr is not None else body.append
+    
+    for i, item in enumerate(diff, 1):
+        # Extract data safely
+        clause_name = item.get("clause_name", f"Clause {i}")
+        cp_text = item.get("original_text", "") or item.get("cp_text", "")
+        
+        # Handle flattened or nested delta structure
+        delta = item.get("delta", item)
+        risk_score = item.get("risk_score") or delta.get("risk_score", "N/A")
+
+        # 1. Heading
+        paras = [_report_paragraph(clause_name, style="Heading2")]
+        
+        # 2. Original Text (Italic)
+        paras.append(_report_paragraph(f"Original Text: \"{cp_text[:200]}...\"", italic=True))
+        
+        # 3. Risk Score (Bold, red when high)
+        paras.append(_report_paragraph(
+            f"Risk Score: {risk_score}/10",
+            bold=True,
+            color="C80000" if str(risk_score) > "5" else "000000",
+        ))
+             
+        # 4. Comments / Reasoning
+        reasoning = delta.get("reasoning", "")
+        if reasoning:
+            paras.append(_report_paragraph(f"Reasoning: {reasoning}"))
+
+        if delta.get("comments"):
+            for c in delta["comments"]: 
+                paras.append(_report_paragraph(c, style="ListBullet"))
+        
+        paras.append(_report_paragraph("_" * 50)) # Separator
+
+        for p in paras:
+            insert(p)
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
 # ---------------------------------------------------------
 # 5. MAIN LOGIC
 # ---------------------------------------------------------
@@ -240,37 +414,74 @@ async def analyze_contract_logic(counterparty_text: str, template_text: Optional
 
     # 4. AI Analysis with Grounding
     persona_instr = CONTRACT_PERSONAS.get(persona, CONTRACT_PERSONAS["General Counsel"])
-    sem = asyncio.Semaphore(10)
+    persona_sig = hashlib.blake2b(persona_instr.encode("utf-8"), digest_size=8).hexdigest()
+    for item in final_queue:
+        item["cache_key"] = _delta_key(item, persona_sig)
+
+    def to_redline(item, delta):
+        # --- APPLY GROUNDING HERE ---
+        # Fixes the 'from' text so the UI can highlight it
+        delta = ground_redlines(item["cp_text"], delta)
+        
+        if delta.get("risk_score", 0) >= 2 or delta.get("replacements"):
+            return {
+                "clause_type": item["label"],
+                "original_text": item["cp_text"],
+                "risk_score": delta.get("risk_score", 0),
+                "delta": delta,
+                # Frontend Aliases
+                "clause_name": item["label"],
+                "cp_text": item["cp_text"],
+                "section": item["label"]
+            }
+        return None
 
     async def analyze_item(item):
-        async with sem:
+        async with _LLM_SEM:
             prompt = build_prompt(item["cp_text"], item["tp_text"], item["label"], persona_instr)
             try:
-                raw = await call_ollama_generate(model=settings.DEFAULT_MODEL_NAME, prompt=prompt, json_mode=True)
+                raw = await call_ollama_generate(model=settings.DEFAULT_MODEL_NAME, prompt=prompt, json_mode=True, num_predict=2048)
                 delta = parse_delta_json(raw)
             except Exception as e:
                 print(f"LLM Error: {e}")
                 return None
-            
-            # --- APPLY GROUNDING HERE ---
-            # Fixes the 'from' text so the UI can highlight it
-            delta = ground_redlines(item["cp_text"], delta)
-            
-            if delta.get("risk_score", 0) >= 2 or delta.get("replacements"):
-                return {
-                    "clause_type": item["label"],
-                    "original_text": item["cp_text"],
-                    "risk_score": delta.get("risk_score", 0),
-                    "delta": delta,
-                    # Frontend Aliases
-                    "clause_name": item["label"],
-                    "cp_text": item["cp_text"],
-                    "section": item["label"]
-                }
-            return None
-
-    tasks = [analyze_item(item) for item in final_queue]
-    results = await asyncio.gather(*tasks)
+        _remember_delta(item["cache_key"], delta)
+        return to_redline(item, delta)
+
+    async def analyze_batch(batch):
+        if len(batch) == 1:
+            return [await analyze_item(batch[0])]
+        async with _LLM_SEM:
+            prompt = build_batch_prompt(batch, persona_instr)
+            try:
+                # Output shares the 8192-token context with the batch prompt
+                raw = await call_ollama_generate(model=settings.DEFAULT_MODEL_NAME, prompt=prompt, json_mode=True, num_predict=min(2048 * len(batch), 6144))
+                deltas = parse_batch_delta_json(raw, len(batch))
+            except Exception as e:
+                print(f"LLM Error: {e}")
+                deltas = None
+        if deltas is None:
+            # Incomplete or malformed batch answer: redo these clauses one at a time
+            return await asyncio.gather(*(analyze_item(item) for item in batch))
+        for item, delta in zip(batch, deltas):
+            _remember_delta(item["cache_key"], delta)
+        return [to_redline(item, delta) for item, delta in zip(batch, deltas)]
+
+    results = []
+    pending = []
+    for item in final_queue:
+        if item["cp_text"].strip() == item["tp_text"].strip():
+            # Verbatim playbook language: nothing to redline, skip the model
+            continue
+        delta = _cached_delta(item["cache_key"])
+        if delta is not None:
+            results.append(to_redline(item, delta))
+        else:
+            pending.append(item)
+
+    k = max(1, settings.CONTRACT_BATCH_SIZE)
+    batches = [pending[i:i + k] for i in range(0, len(pending), k)]
+    results += [r for batch_results in await asyncio.gather(*(analyze_batch(b) for b in batches)) for r in batch_results]
     
     final_redlines = [r for r in results if r is not None]
     final_redlines.sort(key=lambda x: x["risk_score"], reverse=True)
@@ -1,69 +1,80 @@
-import json
-import re
-import smtplib
+import orjson
+import asyncio
+import hashlib
+import aiosmtplib
 from email.message import EmailMessage
-from typing import Dict, Any, List, Optional
-from app.models.schemas import IntakeRequest, IntakeResponse, CsuiteHit
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from app.models.schemas import IntakeRequest, IntakeResponse, IntakeModelOutput, CsuiteHit
 from app.core.config import settings
+from app.utils.llm_client import extract_json_object
+
+# Constrains Ollama's decoder to valid intake JSON (see call_ollama_generate)
+INTAKE_JSON_SCHEMA = IntakeModelOutput.model_json_schema()
 
 # ---------------------------------------------------------
 # PROMPT ENGINEERING
 # ---------------------------------------------------------
+# Static rubric + schema; only the per-request sections are appended below
+_INTAKE_PREAMBLE = (
+    "You are an expert Legal Intake Triage Assistant. Your job is to analyze incoming requests, "
+    "categorize them, assign a priority, and extract key details.\n\n"
+    
+    "### PRIORITY LEVELS (Select ONE)\n"
+    "- Critical (10): Law enforcement, Data Breach, 'Urgent' in subject, restraining orders.\n"
+    "- High (8): C-Suite requests, threatened litigation, imminent deadlines (< 24 hrs).\n"
+    "- Medium (5): Standard contract reviews, compliance questions, tax issues.\n"
+    "- Low (2): General info requests, spam, internal FYI.\n\n"
+    
+    "### OUTPUT FORMAT (Strict JSON)\n"
+    "Return strictly valid JSON. Do not add markdown formatting.\n"
+    "{\n"
+    "  \"categories\": [\"Litigation\", \"Contracts\"],\n"
+    "  \"priority_label\": \"High\",\n"
+    "  \"priority_score\": 8,\n"
+    "  \"summary\": \"One sentence summary of the request\",\n"
+    "  \"csuite_mentions\": [{ \"name\": \"Detected Name\", \"matched_variants\": [\"Detected Name\"] }],\n"
+    "  \"suggested_owner\": \"Optional name based on context\",\n"
+    "  \"suggested_next_steps\": \"Bullet points of immediate actions\",\n"
+    "  \"learning_opportunities\": [\"List of 1-2 training topics relevant to this request (e.g. 'Phishing Awareness', 'Contract Basics')\"]\n"
+    "}\n\n"
+)
+
 def build_intake_prompt(req: IntakeRequest) -> str:
     """
     Constructs the detailed prompt for the Intake LLM.
     """
-    base = (
-        "You are an expert Legal Intake Triage Assistant. Your job is to analyze incoming requests, "
-        "categorize them, assign a priority, and extract key details.\n\n"
-        
-        "### PRIORITY LEVELS (Select ONE)\n"
-        "- Critical (10): Law enforcement, Data Breach, 'Urgent' in subject, restraining orders.\n"
-        "- High (8): C-Suite requests, threatened litigation, imminent deadlines (< 24 hrs).\n"
-        "- Medium (5): Standard contract reviews, compliance questions, tax issues.\n"
-        "- Low (2): General info requests, spam, internal FYI.\n\n"
-        
-        "### OUTPUT FORMAT (Strict JSON)\n"
-        "Return strictly valid JSON. Do not add markdown formatting.\n"
-        "{\n"
-        "  \"categories\": [\"Litigation\", \"Contracts\"],\n"
-        "  \"priority_label\": \"High\",\n"
-        "  \"priority_score\": 8,\n"
-        "  \"summary\": \"One sentence summary of the request\",\n"
-        "  \"csuite_mentions\": [{ \"name\": \"Detected Name\", \"matched_variants\": [\"Detected Name\"] }],\n"
-        "  \"suggested_owner\": \"Optional name based on context\",\n"
-        "  \"suggested_next_steps\": \"Bullet points of immediate actions\",\n"
-        "  \"learning_opportunities\": [\"List of 1-2 training topics relevant to this request (e.g. 'Phishing Awareness', 'Contract Basics')\"]\n"
-        "}\n\n"
-    )
+    parts = [_INTAKE_PREAMBLE]
     
     # Inject Context
     if req.csuite_names: 
-        base += f"### WATCHLIST (Detect these names)\n{', '.join(req.csuite_names)}\n\n"
+        parts.append(f"### WATCHLIST (Detect these names)\n{', '.join(req.csuite_names)}\n\n")
     
     if req.reference_notes: 
-        base += f"### PLAYBOOK & REFERENCE NOTES\n{req.reference_notes}\n\n"
+        parts.append(f"### PLAYBOOK & REFERENCE NOTES\n{req.reference_notes}\n\n")
         
     if req.organization_name:
-        base += f"### CLIENT/ORG\n{req.organization_name}\n\n"
+        parts.append(f"### CLIENT/ORG\n{req.organization_name}\n\n")
 
-    base += f"### INCOMING MESSAGE\n{req.email_text}\n"
+    parts.append(f"### INCOMING MESSAGE\n{req.email_text}\n")
     
-    return base
+    return "".join(parts)
 
 def _safe_parse_intake_json(model_output: str) -> Dict[str, Any]:
     """
     Robust JSON parser.
     """
     try: 
-        return json.loads(model_output)
+        return orjson.loads(model_output)
     except: 
         pass
     
+    # Schema-constrained decoding should make this unreachable; log if it isn't
+    print(f"[Intake] Model output was not valid JSON, trying object scan fallback: {model_output[:200]!r}")
     try:
-        m = re.search(r"\{.*\}", model_output, re.DOTALL)
-        if m: 
-            return json.loads(m.group(0))
+        obj = extract_json_object(model_output)
+        if obj: 
+            return orjson.loads(obj)
     except: 
         pass
         
@@ -78,15 +89,79 @@ def _safe_parse_intake_json(model_output: str) -> Dict[str, Any]:
 # ---------------------------------------------------------
 # TEAM ASSIGNMENT LOGIC
 # ---------------------------------------------------------
-def _skill_match_score(skill: str, category: str) -> float:
-    s, c = skill.lower().strip(), category.lower().strip()
-    if not s or not c: return 0.0
-    if s == c: return 1.0
-    if set(s.split()) & set(c.split()): return 1.0 
-    if s in c or c in s: return 0.8
-    return 0.0
-
-def assign_team_owner(result: IntakeResponse, team_profile: Optional[Dict[str, Any]]) -> IntakeResponse:
+def _build_skill_index(members: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, str, float]], Dict[str, List[int]]]:
+    """
+    Flattens the team into (member_idx, label, mastery) entries plus an
+    inverted index of label token -> entry ids.
+    """
+    entries: List[Tuple[int, str, float]] = []
+    index: Dict[str, List[int]] = defaultdict(list)
+    for mi, m in enumerate(members):
+        for skill in m.get("skills", []):
+            label = skill.get("label", "").lower().strip()
+            mastery = float(skill.get("mastery", 0))
+            eid = len(entries)
+            entries.append((mi, label, mastery))
+            for tok in set(label.split()):
+                index[tok].append(eid)
+    return entries, index
+
+def _skill_match_scores(entries: List[Tuple[int, str, float]], index: Dict[str, List[int]], categories: List[str]) -> List[float]:
+    """
+    Best category match per skill entry:
+    1.0 on exact/shared-token match, 0.8 on substring containment, else 0.0.
+    """
+    best = [0.0] * len(entries)
+    # Normalize + tokenize each distinct category exactly once
+    normalized = dict.fromkeys(c.lower().strip() for c in categories)
+    cat_tokens = [(c, set(c.split())) for c in normalized if c]
+    for c, tokens in cat_tokens:
+        # Token hits via the index (covers exact matches too)
+        for tok in tokens:
+            for eid in index.get(tok, ()):
+                best[eid] = 1.0
+        # Substring fallback only for entries the index missed
+        for eid, (_, label, _) in enumerate(entries):
+            if best[eid] == 0.0 and label and (label in c or c in label):
+                best[eid] = 0.8
+    return best
+
+# Team profiles by content hash: the UI uploads its profile once, then sends only the hash
+_TEAM_PROFILE_CACHE_MAX = 256
+_TEAM_PROFILES: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def remember_team_profile(profile: Dict[str, Any]) -> str:
+    key = hashlib.blake2b(orjson.dumps(profile, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    _TEAM_PROFILES[key] = profile
+    _TEAM_PROFILES.move_to_end(key)
+    if len(_TEAM_PROFILES) > _TEAM_PROFILE_CACHE_MAX:
+        _TEAM_PROFILES.popitem(last=False)
+    return key
+
+def lookup_team_profile(key: str) -> Optional[Dict[str, Any]]:
+    profile = _TEAM_PROFILES.get(key)
+    if profile is not None:
+        _TEAM_PROFILES.move_to_end(key)
+    return profile
+
+# Skill indexes by the same profile hash: built once per team, not once per intake
+_SKILL_INDEXES: "OrderedDict[str, Tuple[List[Tuple[int, str, float]], Dict[str, List[int]]]]" = OrderedDict()
+
+def _skill_index_for(members: List[Dict[str, Any]], profile_hash: Optional[str]):
+    if profile_hash is None:
+        return _build_skill_index(members)
+    hit = _SKILL_INDEXES.get(profile_hash)
+    if hit is not None:
+        _SKILL_INDEXES.move_to_end(profile_hash)
+        return hit
+    built = _build_skill_index(members)
+    _SKILL_INDEXES[profile_hash] = built
+    if len(_SKILL_INDEXES) > _TEAM_PROFILE_CACHE_MAX:
+        _SKILL_INDEXES.popitem(last=False)
+    return built
+
+def assign_team_owner(result: IntakeResponse, team_profile: Optional[Dict[str, Any]], profile_hash: Optional[str] = None) -> IntakeResponse:
+    """profile_hash (from remember_team_profile) lets the skill index be reused across requests."""
     if not team_profile or not team_profile.get("members"): 
         return result
     
@@ -103,20 +178,15 @@ def assign_team_owner(result: IntakeResponse, team_profile: Optional[Dict[str, A
         return result
         
     # Skill Scoring
-    scores = []
-    cats = [c.lower() for c in result.categories]
+    entries, index = _skill_index_for(members, profile_hash)
+    best = _skill_match_scores(entries, index, result.categories)
     
-    for m in members:
-        score = 0.0
-        for skill in m.get("skills", []):
-            label = skill.get("label", "")
-            mastery = float(skill.get("mastery", 0))
-            best_cat_match = max([_skill_match_score(label, c) for c in cats], default=0.0)
-            if best_cat_match > 0:
-                score += best_cat_match * (0.5 + mastery/200)
-                
-        if score > 0:
-            scores.append((score, m["name"]))
+    member_scores = [0.0] * len(members)
+    for (mi, _, mastery), best_cat_match in zip(entries, best):
+        if best_cat_match > 0:
+            member_scores[mi] += best_cat_match * (0.5 + mastery/200)
+    
+    scores = [(score, members[mi]["name"]) for mi, score in enumerate(member_scores) if score > 0]
         
     scores.sort(key=lambda x: x[0], reverse=True)
     
@@ -133,21 +203,99 @@ def assign_team_owner(result: IntakeResponse, team_profile: Optional[Dict[str, A
 # ---------------------------------------------------------
 # NOTIFICATIONS
 # ---------------------------------------------------------
-def send_intake_email(to_email: str, result: IntakeResponse, original_text: str) -> str:
+# One SMTP session per worker, reused across sends (STARTTLS + AUTH happen once)
+_SMTP_LOCK = asyncio.Lock()
+_SMTP_CONN: Optional[aiosmtplib.SMTP] = None
+
+async def _open_smtp() -> aiosmtplib.SMTP:
+    s = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=settings.SMTP_PORT, start_tls=(settings.SMTP_PORT == 587))
+    await s.connect()
+    if settings.SMTP_USERNAME: await s.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    return s
+
+async def _get_smtp() -> aiosmtplib.SMTP:
+    """Returns the pooled connection, reconnecting if the relay dropped it. Call under _SMTP_LOCK."""
+    global _SMTP_CONN
+    if _SMTP_CONN is not None:
+        try:
+            if _SMTP_CONN.is_connected and (await _SMTP_CONN.noop()).code == 250:
+                return _SMTP_CONN
+        except (aiosmtplib.SMTPException, OSError):
+            pass
+        await _close_smtp()
+    _SMTP_CONN = await _open_smtp()
+    return _SMTP_CONN
+
+async def _close_smtp() -> None:
+    global _SMTP_CONN
+    if _SMTP_CONN is not None:
+        try:
+            await _SMTP_CONN.quit()
+        except Exception:
+            pass
+        _SMTP_CONN = None
+
+def _build_intake_message(to_email: str, result: IntakeResponse, original_text: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"[Phoenix] {result.priority_label} - {', '.join(result.categories)}"
+    msg["From"] = settings.INTAKE_EMAIL_FROM
+    msg["To"] = to_email
+    msg.set_content(
+        f"Priority: {result.priority_label} ({result.priority_score}/10)\n"
+        f"Summary: {result.summary}\n\nOriginal:\n{original_text}"
+    )
+    return msg
+
+async def _deliver(msg: EmailMessage) -> None:
+    async with _SMTP_LOCK:
+        try:
+            await (await _get_smtp()).send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Relay closed an idle session between noop() and send: retry once
+            await _close_smtp()
+            await (await _get_smtp()).send_message(msg)
+
+# Background delivery: analyze returns "queued" instead of waiting on the SMTP
+# round trip; one worker drains the queue over the pooled session.
+_NOTIFY_QUEUE: Optional[asyncio.Queue] = None
+_NOTIFY_TASK: Optional[asyncio.Task] = None
+
+async def _notify_worker() -> None:
+    while True:
+        msg = await _NOTIFY_QUEUE.get()
+        try:
+            await _deliver(msg)
+        except Exception as e:
+            print(f"[Intake] Notification to {msg['To']} failed: {e}")
+        finally:
+            _NOTIFY_QUEUE.task_done()
+
+def start_notify_worker() -> None:
+    """Starts the delivery worker on the running loop (idempotent)."""
+    global _NOTIFY_QUEUE, _NOTIFY_TASK
+    if _NOTIFY_TASK is None or _NOTIFY_TASK.done():
+        _NOTIFY_QUEUE = _NOTIFY_QUEUE or asyncio.Queue()
+        _NOTIFY_TASK = asyncio.get_running_loop().create_task(_notify_worker())
+
+async def stop_notify_worker(timeout: float = 10.0) -> None:
+    """Flushes pending notifications (bounded by timeout), then stops the worker and closes SMTP."""
+    global _NOTIFY_TASK
+    if _NOTIFY_TASK is not None:
+        try:
+            await asyncio.wait_for(_NOTIFY_QUEUE.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[Intake] Dropping {_NOTIFY_QUEUE.qsize()} unsent notification(s) on shutdown")
+        _NOTIFY_TASK.cancel()
+        _NOTIFY_TASK = None
+    async with _SMTP_LOCK:
+        await _close_smtp()
+
+def queue_intake_email(to_email: str, result: IntakeResponse, original_text: str) -> str:
     if not settings.SMTP_HOST: return "not_configured"
     try:
-        msg = EmailMessage()
-        msg["Subject"] = f"[Phoenix] {result.priority_label} - {', '.join(result.categories)}"
-        msg["From"] = settings.INTAKE_EMAIL_FROM
-        msg["To"] = to_email
-        msg.set_content(
-            f"Priority: {result.priority_label} ({result.priority_score}/10)\n"
-            f"Summary: {result.summary}\n\nOriginal:\n{original_text}"
-        )
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as s:
-            if settings.SMTP_PORT == 587: s.starttls()
-            if settings.SMTP_USERNAME: s.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            s.send_message(msg)
-        return "sent"
+        msg = _build_intake_message(to_email, result, original_text)
     except Exception as e:
-        return f"error: {e}"
\ No newline at end of file
+        return f"error: {e}"
+    start_notify_worker()
+    _NOTIFY_QUEUE.put_nowait(msg)
+    return "queued"
@@ -1,5 +1,7 @@
 import os
 import re
+from functools import lru_cache
+from threading import Lock
 from typing import Tuple, List, Dict, Any, Optional
 from app.core.config import settings
 
@@ -48,29 +50,70 @@ PERSONAS: Dict[str, Dict[str, str]] = {
     },
 }
 
-_STATUTE_CACHE: Dict[str, Dict[str, str]] = {}
-rag_collection = None
+RAG_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
-if settings.USE_RAG_BACKEND:
+class OnnxEmbeddingFunction:
+    """
+    Chroma embedding function backed by the int8-quantized ONNX export of MiniLM.
+    Same vector space as the PyTorch model (small quantization drift), much faster on CPU.
+    """
+    def __init__(self, model_name: str, file_name: str):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": file_name})
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        vecs = self._model.encode(list(input), batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        return vecs.tolist()
+
+def _build_embedding_fn():
+    from chromadb.utils import embedding_functions
+
+    if settings.RAG_EMBED_BACKEND == "onnx":
+        try:
+            return OnnxEmbeddingFunction(RAG_EMBED_MODEL, settings.RAG_ONNX_FILE)
+        except Exception as e:
+            print(f"[RAG] ONNX embedder unavailable, falling back to PyTorch: {e}")
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=RAG_EMBED_MODEL)
+
+_RAG_LOCK = Lock()
+_RAG_STATE: Optional[Tuple[Optional[Any], Optional[Any]]] = None
+
+def _init_rag() -> Tuple[Optional[Any], Optional[Any]]:
+    """
+    Opens the Chroma collection on first use (chromadb/torch imports are slow).
+    Returns (collection, embedding_fn); both None when RAG is off or broken.
+    Locked because startup warmup runs in a worker thread alongside requests.
+    """
+    global _RAG_STATE
+    if _RAG_STATE is None:
+        with _RAG_LOCK:
+            if _RAG_STATE is None:
+                _RAG_STATE = _open_rag()
+    return _RAG_STATE
+
+def _open_rag() -> Tuple[Optional[Any], Optional[Any]]:
+    if not settings.USE_RAG_BACKEND: return None, None
     try:
         import chromadb
-        from chromadb.utils import embedding_functions
         
         # Determine DB path
         possible_db = os.path.join(REAL_CORPUS_ROOT, "db")
         db_path = possible_db if os.path.exists(possible_db) else settings.RAG_DB_PATH
         
         client = chromadb.PersistentClient(path=db_path)
-        embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        rag_collection = client.get_or_create_collection(
+        embedding_fn = _build_embedding_fn()
+        collection = client.get_or_create_collection(
             name=settings.RAG_COLLECTION_NAME,
             embedding_function=embedding_fn,
         )
         print(f"[RAG] Loaded collection '{settings.RAG_COLLECTION_NAME}' from {db_path}")
+        return collection, embedding_fn
     except Exception as e:
         print(f"[RAG] Failed to initialize Chroma: {e}")
+        return None, None
+
+def get_rag_collection() -> Optional[Any]:
+    return _init_rag()[0]
 
 # ---------------------------------------------------------
 # 3. ROBUST METADATA EXTRACTION
@@ -79,6 +122,11 @@ if settings.USE_RAG_BACKEND:
 # FIX: Regex explicitly stops before trailing asterisks or parentheses
 URL_RE = re.compile(r"(https?://[^\s)\*]+)")
 
+# Statute file header patterns (compiled once; used by get_statute_info)
+_H1_RE = re.compile(r"^#\s+(.*)", re.MULTILINE)
+_STATUTE_URL_RE = re.compile(r"\*Statute URL:\s*(https?://\S+)")
+_STATUTE_URL_LOOSE_RE = re.compile(r"Statute URL:\s*(https?://\S+)", re.IGNORECASE)
+
 def extract_url_from_doc(doc: str, meta: Dict[str, Any]) -> str:
     # 1. Try metadata first
     url = (meta.get("url") or "").strip()
@@ -92,46 +140,81 @@ def extract_url_from_doc(doc: str, meta: Dict[str, Any]) -> str:
     
     return ""
 
-def get_statute_info(source: str, doc: str, meta: Dict[str, Any]) -> Tuple[str, str]:
-    if source in _STATUTE_CACHE:
-        return _STATUTE_CACHE[source]["title"], _STATUTE_CACHE[source]["url"]
+def _resolve_statute_path(source: str) -> Optional[str]:
+    # Misses are not cached: a statute file added later is picked up on the next query
+    try:
+        return _find_statute_path(source)
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=4096)
+def _find_statute_path(source: str) -> str:
+    # --- PATH RESOLUTION FIX ---
+    # 1. Try exact path
+    path = os.path.join(REAL_CORPUS_ROOT, source)
+    if os.path.exists(path):
+        return path
+
+    # 2. If not found, try searching common jurisdiction subfolders (mi, ca)
+    for sub in ["mi", "ca", "michigan", "california"]:
+        test_path = os.path.join(REAL_CORPUS_ROOT, sub, os.path.basename(source))
+        if os.path.exists(test_path):
+            return test_path
+    # Raised rather than returned so lru_cache doesn't remember the miss
+    raise FileNotFoundError(source)
 
+@lru_cache(maxsize=4096)
+def _parse_statute_head(path: str, mtime: float) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Reads the file header once per (path, mtime); an edited file is re-parsed.
+    """
     title, url = None, None
-    
     try:
-        # --- PATH RESOLUTION FIX ---
-        # 1. Try exact path
-        path = os.path.join(REAL_CORPUS_ROOT, source)
+        with open(path, "r", encoding="utf-8") as f:
+            head = f.read(4000) 
+        
+        # Title Extraction
+        m_title = _H1_RE.search(head)
+        if m_title: 
+            title = m_title.group(1).strip()
         
-        # 2. If not found, try searching common jurisdiction subfolders (mi, ca)
-        if not os.path.exists(path):
-            for sub in ["mi", "ca", "michigan", "california"]:
-                test_path = os.path.join(REAL_CORPUS_ROOT, sub, os.path.basename(source))
-                if os.path.exists(test_path):
-                    path = test_path
-                    break
+        # URL Extraction - Restored stricter regex to avoid capturing junk
+        m_url = _STATUTE_URL_RE.search(head)
+        if not m_url:
+            # Fallback to loose regex only if strict fails
+            m_url = _STATUTE_URL_LOOSE_RE.search(head)
         
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                head = f.read(4000) 
-            
-            # Title Extraction
-            m_title = re.search(r"^#\s+(.*)", head, flags=re.MULTILINE)
-            if m_title: 
-                title = m_title.group(1).strip()
-            
-            # URL Extraction - Restored stricter regex to avoid capturing junk
-            m_url = re.search(r"\*Statute URL:\s*(https?://\S+)", head)
-            if not m_url:
-                # Fallback to loose regex only if strict fails
-                m_url = re.search(r"Statute URL:\s*(https?://\S+)", head, re.IGNORECASE)
-            
-            if m_url: 
-                # FIX: Ensure we strip any trailing asterisks captured here too
-                url = m_url.group(1).strip().rstrip("*")
-                
+        if m_url: 
+            # FIX: Ensure we strip any trailing asterisks captured here too
+            url = m_url.group(1).strip().rstrip("*")
     except Exception as e:
-        print(f"[RAG] Error reading source file {source}: {e}")
+        print(f"[RAG] Error reading source file {path}: {e}")
+    return title, url
+
+def get_statute_info(source: str, doc: str, meta: Dict[str, Any], heads: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None) -> Tuple[str, str]:
+    """
+    heads: per-query memo of parsed file headers by path, so chunks from the
+    same statute stat its file once per query rather than once per chunk.
+    """
+    # Fast path: well-populated ingest metadata means no disk read at all
+    meta_title = meta.get("title")
+    meta_url = (meta.get("url") or "").strip()
+    if meta_title and meta_url.startswith(("http://", "https://")):
+        return meta_title, meta_url
+
+    title, url = None, None
+    
+    path = _resolve_statute_path(source)
+    if path:
+        if heads is not None and path in heads:
+            title, url = heads[path]
+        else:
+            try:
+                title, url = _parse_statute_head(path, os.stat(path).st_mtime)
+            except OSError as e:
+                print(f"[RAG] Error reading source file {source}: {e}")
+            if heads is not None:
+                heads[path] = (title, url)
 
     # Fallbacks if file parsing failed
     if not title: 
@@ -143,34 +226,78 @@ def get_statute_info(source: str, doc: str, meta: Dict[str, Any]) -> Tuple[str,
     if not url: 
         url = extract_url_from_doc(doc, meta)
 
-    info = {"title": title, "url": url}
-    _STATUTE_CACHE[source] = info
     return title, url
 
 def infer_jurisdiction(meta: Dict[str, Any]) -> str:
+    jur = (meta.get("jurisdiction") or "").upper()
+    if jur in ("MI", "CA"): return jur
     url = (meta.get("url") or "").lower()
     source = (meta.get("source") or "").lower()
     if "legislature.mi.gov" in url or "michigan" in source or "mcl" in source: return "MI"
     if "leginfo.legislature.ca.gov" in url or "california" in source: return "CA"
     return "UNK"
 
-def get_rag_context_for_persona(question: str, persona_id: str, k: int = 5) -> Tuple[str, List[Dict[str, Any]]]:
+def warm_rag_embedding() -> None:
+    """
+    Opens Chroma and runs one embed so the first query doesn't pay model init.
+    """
+    _, embedding_fn = _init_rag()
+    if embedding_fn is None: return
+    try:
+        embedding_fn(["warmup"])
+    except Exception as e:
+        print(f"[RAG] Embedding warmup failed: {e}")
+
+def embed_query(question: str) -> Optional[Any]:
+    """
+    Embeds the question once so multi-persona queries can share the vector.
+    """
+    collection, embedding_fn = _init_rag()
+    if collection is None or embedding_fn is None: return None
+    try:
+        return embedding_fn([question])[0]
+    except Exception as e:
+        print(f"[RAG] Failed to embed query: {e}")
+        return None
+
+def _query_collection(question: str, where: Optional[Dict[str, Any]] = None, n_results: int = 60, query_embedding: Optional[Any] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+    if query_embedding is not None:
+        kwargs: Dict[str, Any] = {"query_embeddings": [query_embedding], "n_results": n_results}
+    else:
+        kwargs = {"query_texts": [question], "n_results": n_results}
+    if where:
+        kwargs["where"] = where
+    result = get_rag_collection().query(**kwargs)
+    docs = (result.get("documents") or [[]])[0]
+    metas = (result.get("metadatas") or [[]])[0]
+    return docs, metas
+
+def get_rag_context_for_persona(question: str, persona_id: str, k: int = 5, query_embedding: Optional[Any] = None) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Retrieve context.
     FIX: Cap at 10 results max to prevent context overflow with Qwen 14B (8k limit).
+    Pass query_embedding (see embed_query) to skip re-embedding the question.
     """
-    if rag_collection is None: return "", []
+    if get_rag_collection() is None: return "", []
     target_jur = "MI" if persona_id == "mi" else "CA" if persona_id == "ca" else None
     
-    try:
-        result = rag_collection.query(query_texts=[question], n_results=60)
-        docs = result.get("documents", [[]])[0]
-        metas = result.get("metadatas", [[]])[0]
-    except:
-        return "", []
+    docs, metas = [], []
+    # Let Chroma filter by jurisdiction when the index carries that metadata
+    if target_jur:
+        try:
+            docs, metas = _query_collection(question, where={"jurisdiction": target_jur}, query_embedding=query_embedding)
+        except Exception as e:
+            print(f"[RAG] Jurisdiction-filtered query failed, retrying unfiltered: {e}")
+    # Older indexes lack the field: fall back to an unfiltered query + Python filter below
+    if not docs:
+        try:
+            docs, metas = _query_collection(question, query_embedding=query_embedding)
+        except Exception:
+            return "", []
 
     context_pieces, sources = [], []
-    seen_content = set()
+    seen_hashes = set()
+    statute_heads: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
     idx_counter = 1
 
     # --- SAFETY LIMIT ---
@@ -178,8 +305,9 @@ def get_rag_context_for_persona(question: str, persona_id: str, k: int = 5) -> T
     MAX_CHUNKS = 10 
 
     for doc, meta in zip(docs, metas):
-        if doc in seen_content: continue
-        seen_content.add(doc)
+        h = hash(doc)
+        if h in seen_hashes: continue
+        seen_hashes.add(h)
         
         jur = infer_jurisdiction(meta)
         if target_jur and jur != target_jur: continue
@@ -187,7 +315,7 @@ def get_rag_context_for_persona(question: str, persona_id: str, k: int = 5) -> T
         source = meta.get("source", "unknown")
         
         # Pass source to helper to resolve URL/Title from disk
-        title, url = get_statute_info(source, doc, meta)
+        title, url = get_statute_info(source, doc, meta, statute_heads)
 
         context_pieces.append(f"[{idx_counter}] [{jur}] {title}\nCitation: {title}\n{doc}\n")
         sources.append({
@@ -206,27 +334,25 @@ def get_rag_context_for_persona(question: str, persona_id: str, k: int = 5) -> T
 
     return "\n\n".join(context_pieces), sources
 
+# Static system-prompt + header per persona, built once at import
+_PROMPT_PREFIXES: Dict[str, str] = {
+    pid: (
+        f"{persona['system']}\n"
+        "You have access to the following statutes:\n"
+        "=========================================\n"
+    )
+    for pid, persona in PERSONAS.items()
+}
+
 def build_prompt(persona_id: str, question: str, context: Optional[str]) -> str:
     """
     Builds a prompt optimized for Qwen/Llama 3.
     """
-    persona = PERSONAS[persona_id]
-    
     # Qwen instruction format works best with clear delimiters
-    base = (
-        f"{persona['system']}\n"
-        "You have access to the following statutes:\n"
-        "=========================================\n"
-    )
-    
-    if context:
-        base += context
-    else:
-        base += "No matching statutes found in database."
-        
-    base += (
+    return "".join((
+        _PROMPT_PREFIXES[persona_id],
+        context or "No matching statutes found in database.",
         "\n=========================================\n"
         f"USER QUESTION: {question}\n\n"
-        "ANALYSIS:"
-    )
-    return base
\ No newline at end of file
+        "ANALYSIS:",
+    ))
\ No newline at end of file
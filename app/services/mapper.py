@@ -1,5 +1,5 @@
 import asyncio
-import json
+import orjson
 import re
 import io
 import base64
@@ -7,15 +7,8 @@ import gc  # Added for explicit garbage collection
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 
-# Docx dependencies for export
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-except ImportError:
-    Document = None
-
 from app.utils.llm_client import call_ollama_generate
+from app.utils.file_parsing import get_docx_document
 from app.core.config import settings
 
 # ---------------------------------------------------------
@@ -60,6 +53,22 @@ TERM_MAPPING = {
     "pixel": "Web Beacons"
 }
 
+# Recipient bucketing (map_recipient): one compiled alternation per bucket
+# instead of a Python-level substring loop. Patterns match lowercased text.
+_SOCIAL_RE = re.compile(r"social|facebook|meta|twitter|linkedin")
+_ADVERTISING_RE = re.compile(r"advert|marketing|promo|ad network")
+_ANALYTICS_RE = re.compile(r"analytic|track|metric|stat|google")
+_LEGAL_RE = re.compile(r"gov|law|court|police|legal")
+
+# Data types that are really recipient entities ("service providers"): one substring scan
+_BAD_ENTITY_RE = re.compile("|".join(re.escape(b) for b in sorted(BAD_ENTITIES, key=len, reverse=True)))
+
+# Umbrella data types expanded into CORE_PI_FIELDS
+_EXPANSION_TRIGGERS = frozenset((
+    "personal information", "personal data", "information you provide",
+    "information you entered", "commercial information", "account information"
+))
+
 # ---------------------------------------------------------
 # DATA MODELS
 # ---------------------------------------------------------
@@ -93,7 +102,7 @@ def clean_json_string(s: str) -> str:
 def validate_llm_json(raw_output: str) -> List[DataFlowFinding]:
     clean = clean_json_string(raw_output)
     try:
-        data = json.loads(clean)
+        data = orjson.loads(clean)
         if isinstance(data, list):
              return [DataFlowFinding(**item) for item in data]
         result = ChunkResult(**data)
@@ -102,7 +111,7 @@ def validate_llm_json(raw_output: str) -> List[DataFlowFinding]:
         match = re.search(r"\{.*\}", clean, re.DOTALL)
         if match:
             try:
-                data = json.loads(match.group(0))
+                data = orjson.loads(match.group(0))
                 if "findings" in data:
                     return ChunkResult(**data).findings
                 return [DataFlowFinding(**item) for item in data if isinstance(data, list)]
@@ -159,7 +168,7 @@ async def extract_definitions(text: str) -> str:
         f"TEXT:\n{intro_text}"
     )
     try:
-        return await call_ollama_generate(settings.DEFAULT_MODEL_NAME, prompt, False, 256)
+        return await call_ollama_generate(settings.DEFAULT_MODEL_NAME, prompt, num_predict=256)
     except:
         return ""
 
@@ -308,10 +317,10 @@ def extract_flows(classified_chunks: List[Dict[str, Any]], main_controller: str)
         if ("manufacturer" in r_lower or "oem" in r_lower) and "device" not in r_lower: 
             return "Third Party – Manufacturers"
 
-        if any(x in r_lower for x in ["social", "facebook", "meta", "twitter", "linkedin"]): return "Third Party – Social Media"
-        if any(x in r_lower for x in ["advert", "marketing", "promo", "ad network"]): return "Third Party – Advertising"
-        if any(x in r_lower for x in ["analytic", "track", "metric", "stat", "google"]): return "Processor – Analytics"
-        if any(x in r_lower for x in ["gov", "law", "court", "police", "legal"]): return "Third Party – Legal Disclosure"
+        if _SOCIAL_RE.search(r_lower): return "Third Party – Social Media"
+        if _ADVERTISING_RE.search(r_lower): return "Third Party – Advertising"
+        if _ANALYTICS_RE.search(r_lower): return "Processor – Analytics"
+        if _LEGAL_RE.search(r_lower): return "Third Party – Legal Disclosure"
         
         return f"Processor – {r.title()}"
 
@@ -328,20 +337,17 @@ def extract_flows(classified_chunks: List[Dict[str, Any]], main_controller: str)
             
             # --- LAYER 3: CONTEXTUAL EXPANSION ---
             types_to_process = [d_type]
-            expansion_triggers = [
-                "personal information", "personal data", "information you provide", 
-                "information you entered", "commercial information", "account information"
-            ]
             
-            if d_lower in expansion_triggers:
+            if d_lower in _EXPANSION_TRIGGERS:
                 types_to_process = CORE_PI_FIELDS
             
             for final_dtype in types_to_process:
                 if not final_dtype or len(final_dtype) < 2: continue
+                final_lower = final_dtype.lower()
                 
                 # Filter generics ONLY if they weren't expanded/mapped
-                if final_dtype.lower() in GENERIC_TERMS and final_dtype not in CORE_PI_FIELDS: continue
-                if any(bad in final_dtype.lower() for bad in BAD_ENTITIES): continue
+                if final_lower in GENERIC_TERMS and final_dtype not in CORE_PI_FIELDS: continue
+                if _BAD_ENTITY_RE.search(final_lower): continue
                 
                 # --- LAYER 4: ACTION ENFORCEMENT ---
                 raw_recip = item.get("recipient", "")
@@ -431,7 +437,9 @@ def build_swimlane_diagram(entities: Dict[str, str], flows: List[Dict[str, Any]]
 # EXPORT
 # ---------------------------------------------------------
 def generate_mapper_report_docx(controller: str, flows: List[Dict[str, Any]], image_base64: str = None) -> bytes:
+    Document = get_docx_document()
     if Document is None: raise ImportError("python-docx missing")
+    from docx.shared import Inches
 
     doc = Document()
     doc.add_heading(f"Privacy Data Map: {controller}", level=0)
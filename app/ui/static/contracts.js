@@ -0,0 +1,218 @@
+let lastAnalysisData = null;
+let lastUploadedFile = null;
+let availablePersonas = [];
+
+// --- Init ---
+document.addEventListener("DOMContentLoaded", () => {
+    loadPersonas();
+});
+
+async function loadPersonas() {
+    try {
+        const res = await fetch("/api/contracts/personas");
+        const data = await res.json();
+        availablePersonas = data;
+        renderPersonaList();
+        renderPersonaSelect();
+    } catch(e) { console.error("Failed to load personas", e); }
+}
+
+function renderPersonaList() {
+    const frag = document.createDocumentFragment();
+    availablePersonas.forEach(p => {
+        const div = document.createElement("div");
+        div.className = "persona-list-item";
+        div.textContent = p.name;
+        div.onclick = () => openEditor(p);
+        frag.appendChild(div);
+    });
+    document.getElementById("persona_list").replaceChildren(frag);
+}
+
+function renderPersonaSelect() {
+    const sel = document.getElementById("persona_select");
+    const currentVal = sel.value; 
+    const frag = document.createDocumentFragment();
+    availablePersonas.forEach(p => {
+        const opt = document.createElement("option");
+        opt.value = p.name;
+        opt.textContent = p.name;
+        frag.appendChild(opt);
+    });
+    sel.replaceChildren(frag);
+    if (availablePersonas.find(p => p.name === currentVal)) {
+        sel.value = currentVal;
+    }
+}
+
+// --- Editor Logic ---
+function openEditor(persona) {
+    document.getElementById("editor_card").style.display = "block";
+    document.getElementById("edit_name").value = persona.name;
+    document.getElementById("edit_name").disabled = true; // Edit existing by name lock
+    document.getElementById("edit_instructions").value = persona.instructions;
+}
+
+function createNewPersona() {
+    document.getElementById("editor_card").style.display = "block";
+    document.getElementById("edit_name").value = "";
+    document.getElementById("edit_name").disabled = false;
+    document.getElementById("edit_instructions").value = "Tone: ...\nStrategy: ...";
+}
+
+async function savePersona() {
+    const name = document.getElementById("edit_name").value;
+    const instr = document.getElementById("edit_instructions").value;
+    if(!name) return alert("Name required");
+
+    await fetch("/api/contracts/personas", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({ name: name, instructions: instr })
+    });
+    loadPersonas();
+    alert("Saved");
+}
+
+async function deletePersona() {
+    const name = document.getElementById("edit_name").value;
+    if(!confirm("Delete " + name + "?")) return;
+
+    await fetch("/api/contracts/personas/" + encodeURIComponent(name), { method: "DELETE" });
+    document.getElementById("editor_card").style.display = "none";
+    loadPersonas();
+}
+
+// --- Redline Logic ---
+
+async function runRedline() {
+    const output = document.getElementById("output");
+    const status = document.getElementById("status_text");
+    const btn = document.getElementById("analyze_btn");
+    const cpFile = document.getElementById("counterparty").files[0];
+
+    if (!cpFile) return alert("Upload a counterparty DOCX!");
+
+    output.innerHTML = "";
+    document.getElementById("export_area").style.display = "none";
+    status.innerText = "Uploading & Analyzing...";
+    btn.disabled = true;
+    lastUploadedFile = cpFile;
+
+    const formData = new FormData();
+    formData.append("counterparty", cpFile);
+    const tpFile = document.getElementById("template").files[0];
+    if (tpFile) formData.append("template", tpFile);
+
+    try {
+        // 1. Upload
+        const upRes = await fetch("/api/contracts/redline/upload", { method: "POST", body: formData });
+        if (!upRes.ok) throw new Error(await upRes.text());
+        const upData = await upRes.json();
+
+        // 2. Analyze
+        const payload = {
+            counterparty_text: upData.counterparty_text,
+            template_text: upData.template_text,
+            mode: "template_only", 
+            persona: document.getElementById("persona_select").value,
+            role: document.getElementById("role_select").value // NEW
+        };
+
+        const anRes = await fetch("/api/contracts/redline/analyze", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(payload)
+        });
+
+        if (!anRes.ok) throw new Error(await anRes.text());
+        const data = await anRes.json();
+
+        lastAnalysisData = data.diff;
+        status.innerText = `Analysis Complete. ${data.diff.length} issues found.`;
+        status.style.color = "#66BB6A";
+
+        // Show Export Area with Flex for buttons
+        const exp = document.getElementById("export_area");
+        exp.style.display = "flex";
+        exp.style.gap = "12px";
+
+        renderResults(data.diff);
+
+    } catch(e) {
+        status.innerText = "Error: " + e.message;
+        status.style.color = "#ef5350";
+    } finally {
+        btn.disabled = false;
+    }
+}
+
+function renderResults(diffs) {
+    const container = document.getElementById("output");
+    if (!diffs || diffs.length === 0) return container.innerHTML = "<div style='padding:20px; text-align:center;'>No redlines or issues found (Contract looks clean).</div>";
+
+    diffs.forEach(item => {
+        const d = item.delta || {};
+        const ins = d.insertions || [];
+        const del = d.deletions || [];
+        const rep = d.replacements || [];
+        const cmt = d.comments || [];
+        const hasChanges = (ins.length + del.length + rep.length + cmt.length) > 0;
+
+        const card = document.createElement("div");
+        card.className = "analysis-item" + (hasChanges ? " has-changes" : "");
+
+        let html = `<div><div class="clause-label">Clause</div><div class="clause-box">${item.cp_text || "(New Clause)"}</div></div>`;
+
+        if (hasChanges) {
+            ins.forEach(x => html += `<div class="change-row"><span class="badge ins">INSERT</span><span>${x}</span></div>`);
+            del.forEach(x => html += `<div class="change-row"><span class="badge del">DELETE</span><span>${x}</span></div>`);
+            rep.forEach(x => html += `<div class="change-row"><span class="badge rep">REPLACE</span><span>"${x.from}" &rarr; "${x.to}"</span></div>`);
+            cmt.forEach(x => html += `<div class="change-row"><span class="badge cmt">NOTE</span><span>${x}</span></div>`);
+        } else {
+            html += `<div style="margin-top:8px; font-size:0.8rem; color:#666;">No issues found.</div>`;
+        }
+        card.innerHTML = html;
+        container.appendChild(card);
+    });
+}
+
+async function downloadRedline() {
+    if (!lastAnalysisData) return;
+    const toBase64 = file => new Promise((resolve, reject) => {
+        const r = new FileReader(); r.readAsDataURL(file);
+        r.onload = () => resolve(r.result.split(',')[1]); r.onerror = reject;
+    });
+
+    try {
+        const b64 = await toBase64(lastUploadedFile);
+        const res = await fetch("/api/contracts/redline/export", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ original_docx_base64: b64, diff: lastAnalysisData })
+        });
+        if(!res.ok) throw new Error(await res.text());
+
+        const blob = await res.blob();
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement("a"); a.href = url; a.download = "redlined.docx";
+        document.body.appendChild(a); a.click(); document.body.removeChild(a);
+    } catch(e) { alert(e); }
+}
+
+async function downloadReport() {
+    if (!lastAnalysisData) return;
+    try {
+        const res = await fetch("/api/contracts/redline/export-report", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ diff: lastAnalysisData })
+        });
+        if(!res.ok) throw new Error(await res.text());
+
+        const blob = await res.blob();
+        const url = window.URL.createObjectURL(blob);
+        const a = document.createElement("a"); a.href = url; a.download = "Analysis_Report.docx";
+        document.body.appendChild(a); a.click(); document.body.removeChild(a);
+    } catch(e) { alert(e); }
+}
@@ -0,0 +1,383 @@
+const defaultNotes = "# Playbook & Routing Rules\n\n## 1. Commercial & Contracts\n- Keywords: contract, agreement, sow, msa, nda, negotiation, renewal\n- Primary Owner: Ron\n- Priority: Medium (unless 'urgent' or 'today' mentioned)\n\n## 2. Privacy & Cybersecurity\n- Keywords: breach, incident, gdpr, ccpa, dpa, security, privacy\n- Primary Owner: Shawn\n- Priority: High (Critical if 'breach' or 'incident')\n\n## 3. Data & Compliance\n- Keywords: analytics, ai, data usage, compliance, audit, tax\n- Primary Owner: Doug\n- Priority: Medium\n\n## 4. Litigation & Disputes\n- Keywords: lawsuit, subpoena, court, dispute, cease and desist\n- Primary Owner: Ron\n- Priority: High";
+
+const defaultTeamProfile = {
+  members: [
+    {
+      name: "Shawn",
+      skills: [
+        { label: "saas", mastery: 95 },
+        { label: "cybersecurity", mastery: 95 },
+        { label: "privacy", mastery: 95 },
+        { label: "contracts", mastery: 100 },
+        { label: "ai", mastery: 100 },
+        { label: "real estate", mastery: 55 }           
+      ]
+    },
+    {
+      name: "Ron",
+      skills: [
+        { label: "negotiating", mastery: 95 },
+        { label: "contracts", mastery: 95 },
+        { label: "litigation", mastery: 95 },
+        { label: "real estate", mastery: 95 }
+      ]
+    },
+    {
+      name: "Russell",
+      skills: [
+        { label: "open source", mastery: 95 },
+        { label: "compliance", mastery: 95 },
+        { label: "litigation", mastery: 85 }
+        ]
+    }
+  ]
+};
+
+// Team profile and playbook survive reloads via localStorage
+const STORE_PROFILE = "phoenix.teamProfile";
+const STORE_NOTES = "phoenix.refNotes";
+function loadStored(key) { try { return localStorage.getItem(key); } catch (e) { return null; } }
+function saveStored(key, value) { try { localStorage.setItem(key, value); } catch (e) { /* quota/private mode */ } }
+
+function initialTeamProfile() {
+  try {
+    const stored = JSON.parse(loadStored(STORE_PROFILE));
+    if (stored && stored.members) return stored;
+  } catch (e) { /* fall through to defaults */ }
+  return JSON.parse(JSON.stringify(defaultTeamProfile));
+}
+
+let teamProfile = initialTeamProfile();
+
+// The server keeps profiles by hash: after one upload, analyze sends only the hash
+// until the profile changes.
+let sentProfileJson = null;
+let sentProfileHash = null;
+
+// Element lookups done once; handlers (slider input included) reuse these refs
+const DOM = {};
+
+document.addEventListener("DOMContentLoaded", () => {
+  [
+    "org", "email_text", "notify_email", "analyze_btn", "status", "results", "ref_notes", "csuite",
+    "team_profile_container", "team_json", "btn_add_member", "btn_team_apply", "btn_team_reset", "import_file",
+    "result_tpl", "app_modal", "app_modal_msg", "app_modal_input", "app_modal_cancel"
+  ].forEach(id => DOM[id] = document.getElementById(id));
+  const ref = DOM.ref_notes;
+  if (ref && !ref.value.trim()) ref.value = loadStored(STORE_NOTES) ?? defaultNotes;
+  ref.addEventListener("change", () => saveStored(STORE_NOTES, ref.value));
+  renderTeamProfile();
+  bindTeamEvents();
+  DOM.btn_team_reset.addEventListener("click", () => {
+     teamProfile = JSON.parse(JSON.stringify(defaultTeamProfile));
+     renderTeamProfile();
+  });
+  DOM.btn_team_apply.addEventListener("click", applyTeamFromJson);
+  DOM.btn_add_member.addEventListener("click", addMember);
+  DOM.analyze_btn.addEventListener("click", analyzeIntake);
+  DOM.import_file.addEventListener("change", handleFileImport);
+});
+
+// Non-blocking stand-ins for prompt/confirm/alert, backed by one <dialog>
+function openModal(message, {input = false, cancel = true} = {}) {
+  const dlg = DOM.app_modal;
+  const field = DOM.app_modal_input;
+  DOM.app_modal_msg.textContent = message;
+  field.hidden = !input;
+  field.value = "";
+  DOM.app_modal_cancel.hidden = !cancel;
+  dlg.returnValue = "";
+  dlg.showModal();
+  if (input) field.focus();
+  return new Promise(resolve => {
+    dlg.addEventListener("close", () => resolve(dlg.returnValue === "ok" ? field.value : null), {once: true});
+  });
+}
+const askText = (message) => openModal(message, {input: true}).then(v => (v && v.trim()) || null);
+const askConfirm = (message) => openModal(message).then(v => v !== null);
+const notify = (message) => openModal(message, {cancel: false});
+
+function renderTeamProfile() {
+  // Build off-document, then swap in with a single DOM mutation
+  const frag = document.createDocumentFragment();
+  teamProfile.members.forEach(member => frag.appendChild(buildMemberCard(member)));
+  DOM.team_profile_container.replaceChildren(frag);
+  scheduleSync();
+}
+
+// Cards and rows map back to their member/skill objects (not indices), so adding or
+// removing one touches only its own nodes instead of re-rendering the whole team.
+const teamNodes = new WeakMap();
+
+// One delegated listener per event type on the container, however many members/skills
+function bindTeamEvents() {
+  const container = DOM.team_profile_container;
+  container.addEventListener("input", (e) => {
+    if (e.target.type !== "range") return;
+    const skill = teamNodes.get(e.target.closest(".skill-row"));
+    if (!skill) return;
+    skill.mastery = parseInt(e.target.value);
+    e.target.nextElementSibling.textContent = e.target.value;
+    scheduleSync();
+  });
+  container.addEventListener("click", (e) => {
+    const action = e.target.closest("[data-action]");
+    if (!action) return;
+    const card = action.closest(".team-card");
+    const member = teamNodes.get(card);
+    if (!member) return;
+    if (action.dataset.action === "remove-member") removeMember(member, card);
+    else if (action.dataset.action === "add-skill") addSkill(member, card, action.parentElement);
+  });
+}
+
+function buildMemberCard(member) {
+  const card = document.createElement("div");
+  card.className = "team-card";
+  teamNodes.set(card, member);
+  const header = document.createElement("div");
+  header.className = "team-name";
+  header.innerHTML = `<span></span> <span data-action='remove-member' style='cursor:pointer; opacity:0.5;'>&times;</span>`;
+  header.firstElementChild.textContent = member.name;
+  card.appendChild(header);
+
+  member.skills.forEach(skill => card.appendChild(buildSkillRow(skill)));
+
+  const addSkillBtn = document.createElement("div");
+  addSkillBtn.style.textAlign = "center";
+  addSkillBtn.innerHTML = "<span data-action='add-skill' style='font-size:0.7rem; color:#666; cursor:pointer;'>+ Add Skill</span>";
+  card.appendChild(addSkillBtn);
+  return card;
+}
+
+function buildSkillRow(skill) {
+  const row = document.createElement("div");
+  row.className = "skill-row";
+  teamNodes.set(row, skill);
+  const lbl = document.createElement("div");
+  lbl.className = "skill-lbl";
+  lbl.textContent = skill.label;
+  lbl.title = skill.label;
+  const slider = document.createElement("input");
+  slider.type = "range"; slider.min=0; slider.max=100;
+  slider.value = skill.mastery;
+  const valDisp = document.createElement("div");
+  valDisp.className = "skill-val";
+  valDisp.textContent = skill.mastery;
+  row.appendChild(lbl);
+  row.appendChild(slider);
+  row.appendChild(valDisp);
+  return row;
+}
+
+async function addSkill(member, card, addSkillBtn) {
+    const lbl = await askText("Skill Name (e.g. litigation)");
+    if(lbl) {
+        const skill = { label: lbl, mastery: 50 };
+        member.skills.push(skill);
+        card.insertBefore(buildSkillRow(skill), addSkillBtn);
+        scheduleSync();
+    }
+}
+
+async function addMember() {
+    const name = await askText("Member Name:");
+    if(name) {
+        const member = { name: name, skills: [] };
+        teamProfile.members.push(member);
+        DOM.team_profile_container.appendChild(buildMemberCard(member));
+        scheduleSync();
+    }
+}
+
+async function removeMember(member, card) {
+    if(await askConfirm("Remove this member?")) {
+        const mi = teamProfile.members.indexOf(member);
+        if (mi !== -1) teamProfile.members.splice(mi, 1);
+        card.remove();
+        scheduleSync();
+    }
+}
+
+function syncJson() {
+    DOM.team_json.value = JSON.stringify(teamProfile, null, 2);
+    saveStored(STORE_PROFILE, JSON.stringify(teamProfile));
+}
+
+// Slider drags fire input ~60x/s; re-serialize the profile at most once per frame
+let syncPending = false;
+function scheduleSync() {
+    if (syncPending) return;
+    syncPending = true;
+    requestAnimationFrame(() => {
+        syncPending = false;
+        syncJson();
+    });
+}
+
+function applyTeamFromJson() {
+    try {
+        const parsed = JSON.parse(DOM.team_json.value);
+        if(parsed && parsed.members) {
+            teamProfile = parsed;
+            renderTeamProfile();
+        }
+    } catch(e) { notify("Invalid JSON"); }
+}
+
+// Large imports are parsed off the main thread so the page stays responsive
+const WORKER_PARSE_BYTES = 1000000;
+function parseInWorker(text) {
+    const url = URL.createObjectURL(new Blob(
+        ["onmessage = e => { try { postMessage({ok: true, value: JSON.parse(e.data)}); } catch (err) { postMessage({ok: false, error: String(err)}); } };"],
+        {type: "text/javascript"}
+    ));
+    return new Promise((resolve, reject) => {
+        let worker;
+        // Every exit path tears the worker down, so the import can never hang
+        const finish = (settle, value) => {
+            if (worker) worker.terminate();
+            URL.revokeObjectURL(url);
+            settle(value);
+        };
+        try {
+            worker = new Worker(url);
+        } catch (err) {
+            finish(reject, String(err));
+            return;
+        }
+        worker.onmessage = (e) => e.data.ok ? finish(resolve, e.data.value) : finish(reject, e.data.error);
+        worker.onerror = (e) => { e.preventDefault(); finish(reject, e.message || "JSON worker failed"); };
+        worker.onmessageerror = () => finish(reject, "JSON worker returned an unreadable message");
+        worker.postMessage(text);
+    });
+}
+
+async function handleFileImport(e) {
+    const file = e.target.files[0];
+    if (!file) return;
+    e.target.value = '';
+    try {
+        const text = await file.text();
+        const parsed = file.size > WORKER_PARSE_BYTES ? await parseInWorker(text) : JSON.parse(text);
+        if (parsed && parsed.members) {
+            teamProfile = parsed;
+            renderTeamProfile();
+            notify("Team profile imported successfully.");
+        } else {
+            notify("Invalid JSON format. Must contain 'members' array.");
+        }
+    } catch(err) {
+        notify("Error parsing JSON file: " + err);
+    }
+}
+
+// Model/user text only ever goes in via textContent: no HTML parsing, no injection
+function renderIntakeResult(data) {
+   const frag = DOM.result_tpl.content.cloneNode(true);
+   const q = (sel) => frag.querySelector(sel);
+
+   const pLabel = data.priority_label || "Normal";
+   const badge = q(".res-priority");
+   badge.className += " p-" + pLabel;
+   badge.textContent = `${pLabel} (${data.priority_score}/10)`;
+
+   const cats = q(".res-cats");
+   if(data.categories && data.categories.length) {
+       data.categories.forEach(c => {
+           const chip = document.createElement("span");
+           chip.className = "cat-chip";
+           chip.textContent = c;
+           cats.appendChild(chip);
+       });
+   } else {
+       const none = document.createElement("span");
+       none.style.color = "#666";
+       none.textContent = "None";
+       cats.appendChild(none);
+   }
+
+   q(".res-summary").textContent = data.summary;
+
+   const csuite = q(".res-csuite");
+   if(data.csuite_mentions && data.csuite_mentions.length > 0) {
+       data.csuite_mentions.forEach(m => {
+           const box = document.createElement("div");
+           box.className = "csuite-box";
+           const name = document.createElement("strong");
+           name.textContent = m.name;
+           box.append(name, " detected.");
+           csuite.appendChild(box);
+       });
+   } else { csuite.remove(); }
+
+   q(".res-owner").textContent = data.suggested_owner || 'Unassigned';
+   if(data.suggested_backup) q(".res-backup").textContent = `Backup: ${data.suggested_backup}`;
+   else q(".res-backup").remove();
+   if(data.learning_opportunities && data.learning_opportunities.length) {
+       q(".res-training").textContent = `Suggested Training: ${data.learning_opportunities.join(", ")}`;
+   } else { q(".res-training").remove(); }
+
+   if(data.suggested_next_steps) q(".res-steps pre").textContent = data.suggested_next_steps;
+   else q(".res-steps").remove();
+
+   if(data.email_status) q(".res-email").textContent = `Email Notification: ${data.email_status}`;
+   else q(".res-email").remove();
+
+   if(data.original_text) q(".res-original .orig-text").textContent = data.original_text;
+   else q(".res-original").remove();
+
+   return frag;
+}
+
+async function analyzeIntake() {
+   const btn = DOM.analyze_btn;
+   const status = DOM.status;
+   const resultsDiv = DOM.results;
+   const email = DOM.email_text.value;
+   if(!email.trim()) { notify("Please enter message text."); return; }
+
+   btn.disabled = true;
+   status.textContent = " Analyzing content & routing...";
+   resultsDiv.innerHTML = "";
+
+   const profileJson = JSON.stringify(teamProfile);
+   const payload = {
+       email_text: email,
+       reference_notes: DOM.ref_notes.value,
+       organization_name: DOM.org.value,
+       csuite_names: DOM.csuite.value.split(",").map(s=>s.trim()).filter(s=>s),
+       max_categories: 5,
+       notify_email: DOM.notify_email.value
+   };
+   const post = (body) => fetch("/api/intake/analyze", {
+       method: "POST",
+       headers: {"Content-Type": "application/json"},
+       body: JSON.stringify(body)
+   });
+
+   try {
+       let res;
+       if (sentProfileHash && profileJson === sentProfileJson) {
+           res = await post({...payload, team_profile_hash: sentProfileHash});
+       }
+       if (!res || res.status === 409) {
+           // First send, profile edited, or the server no longer has it
+           res = await post({...payload, team_profile: teamProfile});
+       }
+       const data = await res.json();
+       if (data.team_profile_hash) {
+           sentProfileJson = profileJson;
+           sentProfileHash = data.team_profile_hash;
+       }
+
+       status.textContent = " Analysis complete.";
+       resultsDiv.appendChild(renderIntakeResult(data));
+
+   } catch(e) {
+       console.error(e);
+       status.textContent = "Error: " + e;
+   } finally {
+       btn.disabled = false;
+   }
+}
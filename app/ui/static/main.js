@@ -0,0 +1,163 @@
+function makeAnswerCard(label, usedRag) {
+  const card = document.createElement("div");
+  card.className = "answer-card";
+
+  const header = document.createElement("div");
+  header.className = "answer-header";
+
+  header.innerHTML = `
+    <span style="font-weight:500; color:white;">${label}</span>
+    <span class="badge">${usedRag ? "RAG ACTIVE" : "NO RAG"}</span>
+  `;
+
+  const body = document.createElement("div");
+  body.className = "answer-body";
+
+  card.appendChild(header);
+  card.appendChild(body);
+  return {card, body};
+}
+
+function renderSources(answersDiv, sources) {
+  const srcDiv = document.createElement("div");
+  srcDiv.className = "sources-box";
+  let html = "<div style='color:var(--text-secondary); margin-bottom:12px; font-weight:500;'>CITATIONS & SOURCES</div>";
+
+  sources.forEach(s => {
+     let displayTitle = s.title;
+     if (!displayTitle) {
+          displayTitle = s.source.split('/').pop().replace('.md', '').replace(/_/g, ' ').toUpperCase();
+     }
+     const label = s.jurisdiction === "MI" ? "Michigan" : s.jurisdiction === "CA" ? "California" : "Ref";
+
+     let action = "";
+     if (s.url && s.url.startsWith("http")) {
+         action = `<a href="${s.url}" class="source-link" target="_blank">[Official Source]</a>`;
+     } else {
+         action = `<span style="font-size:0.8rem; color:#666;">(No online link available)</span>`;
+     }
+
+     html += `<div style="margin-bottom:12px; font-family:'Roboto', sans-serif; font-size:0.9rem; border-left:3px solid #444; padding-left:12px;">
+        <div style="font-weight:500; color:#e0e0e0;">${displayTitle} <span style="font-size:0.75em; color:#888; margin-left:8px; text-transform:uppercase;">${label}</span></div>
+        <div style="margin-top:2px;">${action}</div>
+     </div>`;
+  });
+  srcDiv.innerHTML = html;
+  answersDiv.appendChild(srcDiv);
+}
+
+// fetch() + reader instead of EventSource, which can only GET
+async function readEvents(resp, onEvent) {
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  while (true) {
+    const {value, done} = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, {stream: true});
+    let sep;
+    while ((sep = buf.indexOf("\n\n")) !== -1) {
+      const block = buf.slice(0, sep);
+      buf = buf.slice(sep + 2);
+      let event = "message", data = "";
+      block.split("\n").forEach(line => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      onEvent(event, data ? JSON.parse(data) : {});
+    }
+  }
+}
+
+async function askAgents() {
+  const btn = document.getElementById("ask_btn");
+  const status = document.getElementById("status");
+  const answersDiv = document.getElementById("answers");
+  const q = document.getElementById("question").value.trim();
+  const useRag = document.getElementById("use_rag").checked;
+
+  const personas = [];
+  if (document.getElementById("p_mi").checked) personas.push("mi");
+  if (document.getElementById("p_ca").checked) personas.push("ca");
+
+  if (!q) {
+    status.textContent = "Please enter a question.";
+    return;
+  }
+  if (personas.length === 0) {
+    status.textContent = "Select at least one jurisdiction.";
+    return;
+  }
+
+  btn.disabled = true;
+  status.textContent = "Searching statutes and generating response...";
+  answersDiv.innerHTML = "";
+
+  try {
+    const resp = await fetch("/api/legal/query", {
+      method: "POST",
+      headers: {"Content-Type": "application/json", "Accept": "text/event-stream, application/json"},
+      body: JSON.stringify({
+        question: q,
+        personas: personas,
+        use_rag: useRag
+      })
+    });
+    if (!resp.ok) {
+      const t = await resp.text();
+      status.textContent = "Error: " + t;
+      btn.disabled = false;
+      return;
+    }
+
+    if ((resp.headers.get("content-type") || "").includes("text/event-stream")) {
+      // Streamed: each persona's answer fills in token by token
+      const cards = {};
+      let sources = [];
+      let usedRag = false;
+      await readEvents(resp, (event, data) => {
+        if (event === "sources") {
+          sources = data.sources || [];
+          usedRag = data.used_rag;
+          (data.personas || []).forEach(p => {
+            cards[p.persona] = makeAnswerCard(p.label, usedRag);
+            answersDiv.appendChild(cards[p.persona].card);
+          });
+        } else if (event === "token") {
+          status.textContent = "";
+          const c = cards[data.persona];
+          if (c) c.body.append(data.token);
+        } else if (event === "error") {
+          const c = cards[data.persona];
+          if (c) c.body.append(`(Error: ${data.detail})`);
+        } else if (event === "done") {
+          status.textContent = "";
+          if (usedRag && sources.length) renderSources(answersDiv, sources);
+        }
+      });
+      return;
+    }
+
+    const data = await resp.json();
+    status.textContent = "";
+
+    data.answers.forEach(ans => {
+      const {card, body} = makeAnswerCard(ans.label, data.used_rag);
+      body.textContent = ans.answer;
+      answersDiv.appendChild(card);
+    });
+
+    if (data.used_rag && data.sources && data.sources.length) {
+      renderSources(answersDiv, data.sources);
+    }
+
+  } catch (err) {
+    console.error(err);
+    status.textContent = "Network error: " + err;
+  } finally {
+    btn.disabled = false;
+  }
+}
+
+document.getElementById("ask_btn").addEventListener("click", askAgents);
+document.getElementById("use_rag").checked = true;
@@ -0,0 +1,291 @@
+import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs';
+
+// Single, canonical mermaid init (removed the duplicate init from <head>)
+mermaid.initialize({
+  startOnLoad: false,
+  theme: 'base',
+  themeVariables: {
+    darkMode: true,
+    background: '#181818',
+    mainBkg: '#1E1E1E',
+    primaryColor: '#03DAC6',
+    primaryTextColor: '#E0E0E0',
+    lineColor: '#555',
+    fontFamily: 'Roboto'
+  },
+  securityLevel: 'loose',
+  flowchart: {
+    useMaxWidth: false,
+    htmlLabels: true,
+    curve: 'basis',
+    padding: 20
+  }
+});
+
+window.currentMode = 'upload';
+window.currentZoom = 1.0;
+window.lastAnalysisData = null;
+
+// UI Logic
+window.setMode = function(mode) {
+  window.currentMode = mode;
+  document.querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
+  document.querySelector(`button[onclick="setMode('${mode}')"]`).classList.add('active');
+  document.querySelectorAll('.input-section').forEach(d => d.classList.remove('active'));
+  document.getElementById(`input_${mode}`).classList.add('active');
+}
+
+window.handleFileSelect = function(input) {
+  const fn = input.files[0] ? input.files[0].name : "";
+  document.getElementById("file_name").textContent = fn;
+}
+
+// Zoom Logic
+window.applyZoom = function(val) {
+  window.currentZoom = parseFloat(val);
+  const svg = document.querySelector('#diagram_scroll_area svg');
+  const label = document.getElementById('zoomLabel');
+  if (svg) {
+    svg.style.width = (window.currentZoom * 100) + "%";
+    label.innerText = Math.round(window.currentZoom * 100) + "%";
+  }
+}
+
+window.adjustZoom = function(delta) {
+  const range = document.getElementById('zoomRange');
+  let newVal = parseFloat(range.value) + delta;
+  if (newVal < 0.5) newVal = 0.5;
+  if (newVal > 3.0) newVal = 3.0;
+  range.value = newVal;
+  applyZoom(newVal);
+}
+
+window.resetZoom = function() {
+  document.getElementById('zoomRange').value = 1.0;
+  applyZoom(1.0);
+}
+
+function sanitizeId(text) {
+  if (!text) return "unknown";
+  return text.replace(/[^a-zA-Z0-9]/g, "");
+}
+
+function sanitizeLabel(text) {
+  if (!text) return "";
+  let clean = text.substring(0, 30);
+  if (text.length > 30) clean += "...";
+  clean = clean.replace(/["'(){}\[\]]/g, "");
+  return clean;
+}
+
+// Prevent node id collisions (mermaid merges nodes with same id)
+function makeIdFactory() {
+  const used = new Set();
+  return function uniqueId(raw) {
+    let base = sanitizeId(raw) || "node";
+    let id = base;
+    let i = 2;
+    while (used.has(id)) id = `${base}_${i++}`;
+    used.add(id);
+    return id;
+  };
+}
+
+window.runMapper = async function() {
+  const status = document.getElementById("status");
+  const out = document.getElementById("output");
+  const resultArea = document.getElementById("result_area");
+  const diagArea = document.getElementById("diagram_scroll_area");
+  const legendContainer = document.getElementById("legend_container");
+  const btn = document.getElementById("run_btn");
+
+  const form = new FormData();
+  if (window.currentMode === 'upload') {
+    const fileInput = document.getElementById("file");
+    if (!fileInput.files.length) { alert("Please select a file."); return; }
+    form.append("file", fileInput.files[0]);
+  } else {
+    const textVal = document.getElementById("text_input").value;
+    if (!textVal) { alert("Please paste text."); return; }
+    form.append("payload_text", textVal);
+  }
+
+  btn.disabled = true;
+  btn.innerText = "Processing...";
+  status.innerText = "Analyzing text with LLM...";
+  resultArea.style.display = "none";
+  diagArea.innerHTML = "";
+
+  try {
+    const res = await fetch("/api/mapper", { method: "POST", body: form });
+    const data = await res.json();
+
+    if (data.error) throw new Error(data.error);
+
+    window.lastAnalysisData = data;
+    status.innerText = "";
+    resultArea.style.display = "block";
+    out.textContent = JSON.stringify(data, null, 2);
+    document.getElementById("node_count").innerText = (data.diagram.nodes || []).length;
+    document.getElementById("flow_count").innerText = (data.diagram.edges || []).length;
+
+    // --- 1. RENDER DIAGRAM ---
+    let graphDef = "graph LR\n";
+    graphDef += "classDef company fill:#37474F,stroke:#90A4AE,color:#ECEFF1,stroke-width:2px,rx:5,ry:5;\n";
+    graphDef += "classDef user fill:#00695C,stroke:#4DB6AC,color:#E0F2F1,stroke-width:2px,rx:5,ry:5;\n";
+    graphDef += "classDef thirdparty fill:#4527A0,stroke:#9575CD,color:#EDE7F6,stroke-width:2px,rx:5,ry:5;\n";
+
+    const laneColors = {
+      "user": "user",
+      "company": "company",
+      "controller": "company",
+      "thirdparty": "thirdparty",
+      "vendors": "thirdparty",
+      "partners": "thirdparty",
+      "government": "thirdparty"
+    };
+
+    const uniqueId = makeIdFactory();
+    const idMap = new Map(); // raw id -> unique mermaid id
+
+    function getNodeId(raw) {
+      if (!idMap.has(raw)) idMap.set(raw, uniqueId(raw));
+      return idMap.get(raw);
+    }
+
+    // Nodes (stable subgraph ids; avoids styling issues)
+    if (data.diagram.lanes) {
+      data.diagram.lanes.forEach(lane => {
+        const laneId = `lane_${sanitizeId(lane) || "lane"}`;
+        const laneLabel = (lane || "").toUpperCase();
+
+        graphDef += `subgraph ${laneId}["${laneLabel}"]\n`;
+        graphDef += `direction TB\n`;
+
+        (data.diagram.nodes || []).filter(n => n.lane === lane).forEach(n => {
+          const mid = getNodeId(n.id);
+          const cleanLbl = sanitizeLabel(n.label);
+          const styleClass = laneColors[lane] || 'company';
+          graphDef += `${mid}("${cleanLbl}"):::${styleClass}\n`;
+        });
+
+        graphDef += "end\n";
+        graphDef += `style ${laneId} fill:#1E1E1E,stroke:#444,stroke-width:1px,color:#888\n`;
+      });
+    } else {
+      // fallback: render nodes without lanes
+      (data.diagram.nodes || []).forEach(n => {
+        const mid = getNodeId(n.id);
+        const cleanLbl = sanitizeLabel(n.label);
+        const styleClass = laneColors[n.lane] || 'company';
+        graphDef += `${mid}("${cleanLbl}"):::${styleClass}\n`;
+      });
+    }
+
+    // Edges
+    if (data.diagram.edges) {
+      data.diagram.edges.forEach((e, i) => {
+        const src = getNodeId(e.from);
+        const tgt = getNodeId(e.to);
+        const idx = i + 1;
+        graphDef += `${src} -- ${idx} --> ${tgt}\n`;
+      });
+    }
+
+    const diagDiv = document.getElementById("diagram_scroll_area");
+    diagDiv.innerHTML = `<pre class="mermaid" id="mermaid-graph">${graphDef}</pre>`;
+    await mermaid.run({ nodes: [document.getElementById("mermaid-graph")] });
+    resetZoom();
+
+    // --- 2. RENDER LEGEND (Simple Chips) ---
+    legendContainer.innerHTML = "";
+
+    (data.flows || []).forEach((f, i) => {
+      const card = document.createElement("div");
+      card.className = "flow-card";
+
+      const color = f.category === "Sharing" ? "var(--accent)" : "var(--primary)";
+      const recipient = f.category === "Sharing"
+        ? `To: <span>${(f.to || "")}</span>`
+        : `From: <span>User</span>`;
+
+      let tagsHtml = "";
+      if (f.data_types && f.data_types.length) {
+        tagsHtml = f.data_types.map(dt => `<span class="data-tag">${dt}</span>`).join("");
+      } else {
+        tagsHtml = `<span style="color:#666; font-size:0.8rem;">No specific data types listed.</span>`;
+      }
+
+      card.innerHTML = `
+        <div class="flow-header">
+          <div class="flow-title" style="color:${color}">${f.category || "Flow"}</div>
+          <div class="flow-index">${i+1}</div>
+        </div>
+        <div class="flow-body">
+          <div class="flow-meta">${recipient}</div>
+          <div class="tags-container">${tagsHtml}</div>
+        </div>
+      `;
+      legendContainer.appendChild(card);
+    });
+
+  } catch (e) {
+    console.error(e);
+    alert("Error: " + e.message);
+    status.innerText = "Error occurred.";
+  } finally {
+    btn.disabled = false;
+    btn.innerText = "Generate Map";
+  }
+};
+
+// Function to generate the report
+window.downloadMapperReport = async function() {
+  if (!window.lastAnalysisData) return;
+  const svg = document.querySelector('#diagram_scroll_area svg');
+  if (!svg) return alert("Diagram not ready");
+
+  const serializer = new XMLSerializer();
+  const source = serializer.serializeToString(svg);
+  const encodedData = 'data:image/svg+xml;base64,' + btoa(unescape(encodeURIComponent(source)));
+
+  const canvas = document.createElement('canvas');
+  const ctx = canvas.getContext('2d');
+  const img = new Image();
+
+  const bbox = svg.getBoundingClientRect();
+  canvas.width = bbox.width * 2;
+  canvas.height = bbox.height * 2;
+
+  img.onload = async function() {
+    ctx.fillStyle = "#1E1E1E";
+    ctx.fillRect(0, 0, canvas.width, canvas.height);
+    ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
+    const pngData = canvas.toDataURL("image/png");
+
+    try {
+      const resp = await fetch("/api/mapper/export-report", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({
+          image_base64: pngData,
+          flows: window.lastAnalysisData.flows,
+          controller: window.lastAnalysisData.controller_detected || "Unknown"
+        })
+      });
+      if (!resp.ok) throw new Error(await resp.text());
+      const blob = await resp.blob();
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = "Privacy_Map_Report.docx";
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+    } catch (e) {
+      console.error(e);
+      alert("Export failed: " + e.message);
+    }
+  };
+  img.src = encodedData;
+}
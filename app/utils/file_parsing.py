@@ -1,24 +1,32 @@
 import io
 import re
+from functools import lru_cache
 from fastapi import HTTPException
 from bs4 import BeautifulSoup
 
 # Optional Imports handling
-try:
-    from docx import Document
-except ImportError:
-    Document = None
-
 try:
     from pypdf import PdfReader
 except ImportError:
     PdfReader = None
 
+@lru_cache(maxsize=1)
+def get_docx_document():
+    """
+    Deferred python-docx import (pulls in lxml); returns the Document class or None.
+    """
+    try:
+        from docx import Document
+        return Document
+    except ImportError:
+        return None
+
 def extract_docx_text(file_bytes: bytes) -> str:
     """
     Extracts text from a DOCX file using python-docx.
     Traverses paragraphs and tables to get full content.
     """
+    Document = get_docx_document()
     if Document is None: 
         raise HTTPException(status_code=500, detail="python-docx library not installed")
     try:
@@ -63,7 +71,7 @@ def preprocess_document_from_upload(filename: str, file_bytes: bytes) -> dict:
                 return {"clean_text": "Error: pypdf library not installed.", "paragraphs": []}
                 
         elif fn.endswith(".docx"):
-            if Document:
+            if get_docx_document():
                 try:
                     text = extract_docx_text(file_bytes)
                 except HTTPException:
@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Set, Tuple
+
+# Optional Imports handling
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# -----------------------------------------------------------
+# Multi-pattern substring matching
+# -----------------------------------------------------------
+
+class KeywordMatcher:
+    """
+    Finds which of many keywords occur in a text in a single scan.
+    Uses a pyahocorasick automaton when installed, otherwise one compiled
+    regex alternation. Keywords are matched as plain (case-sensitive) substrings;
+    lowercase both sides for case-insensitive matching.
+    """
+
+    def __init__(self, keywords: Dict[str, Any]):
+        # An empty keyword is a substring of everything
+        self._always: Set[Any] = {v for k, v in keywords.items() if not k}
+        words = {k: v for k, v in keywords.items() if k}
+
+        self._automaton = None
+        self._regex = None
+        self._closure: Dict[str, Set[Any]] = {}
+
+        if not words:
+            return
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for k, v in words.items():
+                automaton.add_word(k, v)
+            automaton.make_automaton()
+            self._automaton = automaton
+            return
+
+        # Regex fallback: the lookahead tries every start position and the
+        # longest-first alternation picks the longest keyword there. Any other
+        # keyword starting at that position is a prefix of it, so each keyword
+        # carries the payloads of all its prefixes.
+        ordered = sorted(words, key=len, reverse=True)
+        self._closure = {k: {v for p, v in words.items() if k.startswith(p)} for k in ordered}
+        self._regex = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+
+    def payloads(self, text: str) -> Set[Any]:
+        """Payloads of every keyword found in text."""
+        found = set(self._always)
+        if self._automaton is not None:
+            for _, v in self._automaton.iter(text):
+                found.add(v)
+        elif self._regex is not None:
+            for m in self._regex.finditer(text):
+                found |= self._closure[m.group(1)]
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        if self._always:
+            return True
+        if self._automaton is not None:
+            for _ in self._automaton.iter(text):
+                return True
+            return False
+        if self._regex is not None:
+            return self._regex.search(text) is not None
+        return False
+
+
+@lru_cache(maxsize=256)
+def watchlist_matcher(terms: Tuple[str, ...]) -> KeywordMatcher:
+    """Cached matcher for a recurring watchlist (terms already normalized)."""
+    return KeywordMatcher({t: t for t in terms})
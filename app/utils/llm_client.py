@@ -1,20 +1,141 @@
 import httpx
-import json
+import asyncio
+import hashlib
+import orjson
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional
 from app.core.config import settings
 
-async def call_ollama_generate(model: str, prompt: str, json_mode: bool = False, num_predict: int = 1024) -> str:
-    url = f"{settings.OLLAMA_URL}/api/generate"
+# Shared client: keeps HTTP keepalive to Ollama instead of reconnecting on every call.
+# Opened on app startup and closed on shutdown (see main.py).
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=600.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _HTTP_CLIENT
+
+async def close_http_client() -> None:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+# Small LRU of non-streamed responses keyed on a digest of the full request payload
+# (model, prompt, format, budget). Repeated submissions - the same email re-analyzed,
+# the same question asked again - skip the model round trip entirely.
+_RESPONSE_CACHE_MAX = 512
+_RESPONSE_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+# Identical requests already on their way to Ollama (e.g. a double-click)
+_INFLIGHT: Dict[bytes, "asyncio.Future[str]"] = {}
+
+def _payload_key(payload: dict) -> bytes:
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
+def _build_payload(model: str, prompt: str, json_mode: bool, num_predict: int, stream: bool, json_schema: Optional[Dict[str, Any]] = None) -> dict:
     payload = {
         "model": model,
         "prompt": prompt,
-        "stream": False,
-        "num_predict": num_predict, 
-        "num_ctx": 8192,
+        "stream": stream,
+        # Sampling/runtime parameters are only read from "options"
+        "options": {"num_predict": num_predict, "num_ctx": 8192},
     }
-    if json_mode:
+    if json_schema:
+        # Ollama >= 0.5: constrain decoding to this schema
+        payload["format"] = json_schema
+    elif json_mode:
         payload["format"] = "json"
+    return payload
+
+async def _post_generate(url: str, payload: dict, client: httpx.AsyncClient) -> str:
+    resp = await client.post(url, json=payload)
+    resp.raise_for_status()
+    return resp.json().get("response", "").strip()
+
+async def call_ollama_generate(model: str, prompt: str, *, json_mode: bool = False, num_predict: int = 512, json_schema: Optional[Dict[str, Any]] = None, client: Optional[httpx.AsyncClient] = None, cache: bool = False) -> str:
+    """
+    num_predict caps generated tokens; callers pass a budget sized to their output.
+    cache=True reuses the answer to an identical earlier request (see _RESPONSE_CACHE).
+    """
+    url = f"{settings.OLLAMA_URL}/api/generate"
+    payload = _build_payload(model, prompt, json_mode, num_predict, stream=False, json_schema=json_schema)
+
+    client = client or get_http_client()
+    if not cache:
+        return await _post_generate(url, payload, client)
+
+    key = _payload_key(payload)
+    hit = _RESPONSE_CACHE.get(key)
+    if hit is not None:
+        _RESPONSE_CACHE.move_to_end(key)
+        return hit
+
+    pending = _INFLIGHT.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    task = asyncio.ensure_future(_post_generate(url, payload, client))
+    _INFLIGHT[key] = task
+    try:
+        # shield: a cancelled caller must not cancel the request for the others waiting on it
+        text = await asyncio.shield(task)
+    finally:
+        _INFLIGHT.pop(key, None)
+
+    _RESPONSE_CACHE[key] = text
+    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX:
+        _RESPONSE_CACHE.popitem(last=False)
+    return text
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    First balanced {...} in chatty model output, found in one left-to-right pass.
+    Braces inside JSON strings (including escaped quotes) are ignored.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_str = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+async def stream_ollama_generate(model: str, prompt: str, *, num_predict: int = 512, client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[str]:
+    """
+    Yields response tokens as Ollama produces them (NDJSON, one object per line).
+    """
+    url = f"{settings.OLLAMA_URL}/api/generate"
+    payload = _build_payload(model, prompt, False, num_predict, stream=True)
 
-    async with httpx.AsyncClient(timeout=600.0) as client:
-        resp = await client.post(url, json=payload)
+    client = client or get_http_client()
+    async with client.stream("POST", url, json=payload) as resp:
         resp.raise_for_status()
-        return resp.json().get("response", "").strip()
\ No newline at end of file
+        async for line in resp.aiter_lines():
+            if not line: continue
+            chunk = orjson.loads(line)
+            token = chunk.get("response", "")
+            if token:
+                yield token
+            if chunk.get("done"):
+                break
\ No newline at end of file
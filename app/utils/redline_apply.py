@@ -1,54 +1,41 @@
 import io
 import difflib
 import re
-from typing import List, Dict, Any, Tuple, Optional
+from typing import IO, List, Dict, Any, Tuple, Optional
 from docx import Document
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from xml.sax.saxutils import escape
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
 from docx.shared import RGBColor
+from app.utils.keyword_matcher import KeywordMatcher
 
 # ---------------------------------------------------------
 # 1. XML Helpers for Track Changes
 # ---------------------------------------------------------
 
+# Whole <w:ins>/<w:del> subtrees parsed from one string each, instead of building
+# them element by element (one Python -> lxml round trip per node and attribute)
+_CHANGE_ATTRS = 'w:id="0" w:author="Phoenix AI" w:date="2025-01-01T00:00:00Z"'
+_INS_XML = f'<w:ins {nsdecls("w")} {_CHANGE_ATTRS}><w:r><w:t{{space}}>{{text}}</w:t></w:r></w:ins>'
+# Visual strikethrough inside the deletion (double visual cue)
+_DEL_XML = f'<w:del {nsdecls("w")} {_CHANGE_ATTRS}><w:r><w:rPr><w:strike/></w:rPr><w:t{{space}}>{{text}}</w:t></w:r></w:del>'
+
+# Control characters XML 1.0 can't carry; model output occasionally contains them
+_XML_INVALID_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _xml_text(text: str) -> str:
+    return escape(_XML_INVALID_RE.sub("", text))
+
+def _space_attr(text: str) -> str:
+    return ' xml:space="preserve"' if text.strip() else ""
+
 def _make_insert_run(text: str):
     """Creates a <w:ins> node (Track Changes Insertion)."""
-    ins = OxmlElement("w:ins")
-    ins.set(qn("w:id"), "0")
-    ins.set(qn("w:author"), "Phoenix AI")
-    ins.set(qn("w:date"), "2025-01-01T00:00:00Z")
-
-    run = OxmlElement("w:r")
-    t = OxmlElement("w:t")
-    if text.strip():
-        t.set(qn("xml:space"), "preserve")
-    t.text = text
-    run.append(t)
-    ins.append(run)
-    return ins
+    return parse_xml(_INS_XML.format(space=_space_attr(text), text=_xml_text(text)))
 
 def _make_delete_run(text: str):
     """Creates a <w:del> node (Track Changes Deletion)."""
-    dele = OxmlElement("w:del")
-    dele.set(qn("w:id"), "0")
-    dele.set(qn("w:author"), "Phoenix AI")
-    dele.set(qn("w:date"), "2025-01-01T00:00:00Z")
-
-    run = OxmlElement("w:r")
-    
-    # Visual strikethrough inside the deletion (double visual cue)
-    rPr = OxmlElement("w:rPr")
-    strike = OxmlElement("w:strike")
-    rPr.append(strike)
-    run.append(rPr)
-
-    t = OxmlElement("w:t")
-    if text.strip():
-        t.set(qn("xml:space"), "preserve")
-    t.text = text
-    run.append(t)
-    dele.append(run)
-    return dele
+    return parse_xml(_DEL_XML.format(space=_space_attr(text), text=_xml_text(text)))
 
 # ---------------------------------------------------------
 # 2. Fuzzy Matching Logic
@@ -119,6 +106,15 @@ def apply_deltas_to_paragraph(paragraph, delta: Dict[str, Any]):
             prefix = full_text[:start_idx]
             actual_old_text = full_text[start_idx:end_idx] # The text actually in the doc
             suffix = full_text[end_idx:]
+
+            # Build the tracked-change nodes before touching the paragraph, so a
+            # failure leaves the original text in place rather than an emptied paragraph
+            try:
+                del_node = _make_delete_run(actual_old_text)
+                ins_node = _make_insert_run(new_str) if new_str else None
+            except Exception as e:
+                print(f"[Redline] Skipping edit that could not be rendered as XML: {e}")
+                continue
             
             # 1. Clear the paragraph XML
             p_element = paragraph._p
@@ -136,12 +132,10 @@ def apply_deltas_to_paragraph(paragraph, delta: Dict[str, Any]):
                 r.append(t)
 
             # 3. Add Deletion (The text we found in the doc)
-            del_node = _make_delete_run(actual_old_text)
             p_element.append(del_node)
 
             # 4. Add Insertion (The AI's suggested text)
-            if new_str:
-                ins_node = _make_insert_run(new_str)
+            if ins_node is not None:
                 p_element.append(ins_node)
 
             # 5. Rebuild Suffix (Normal)
@@ -158,7 +152,7 @@ def apply_deltas_to_paragraph(paragraph, delta: Dict[str, Any]):
     if comments:
         run = paragraph.add_run()
         run.add_break() 
-        comment_text = "[AI: " + "; ".join(comments) + "]"
+        comment_text = _XML_INVALID_RE.sub("", "[AI: " + "; ".join(comments) + "]")
         run.text = comment_text
         run.bold = True
         run.font.color.rgb = RGBColor(0, 50, 150)
@@ -170,18 +164,27 @@ def apply_deltas_to_paragraph(paragraph, delta: Dict[str, Any]):
 def apply_redlines_to_docx(
     original_doc_bytes: bytes,
     redlines: List[Dict[str, Any]],
-) -> bytes:
+    out_stream: Optional[IO[bytes]] = None,
+) -> Optional[bytes]:
+    """
+    Returns the redlined .docx bytes, or writes them into out_stream (and
+    returns None) so callers can stream large documents without a second copy.
+    """
     doc = Document(io.BytesIO(original_doc_bytes))
 
-    # Optimization: Map paragraphs by text for faster lookup
-    # We use a list of (index, text) to handle duplicate paragraphs correctly
-    para_map = []
-    for i, p in enumerate(doc.paragraphs):
-        para_map.append({
-            "index": i, 
-            "text": p.text.strip(), 
-            "obj": p
-        })
+    # Paragraph lookups are built once per document rather than rescanned per redline:
+    # exact text -> first paragraph, and one multi-pattern matcher over the longer
+    # paragraphs that finds every one contained in a (possibly stitched) redline
+    # text in a single pass.
+    paras = doc.paragraphs
+    texts = [p.text.strip() for p in paras]
+    exact_index: Dict[str, int] = {}
+    long_index: Dict[str, int] = {}
+    for i, text in enumerate(texts):
+        exact_index.setdefault(text, i)
+        if len(text) > 50:
+            long_index.setdefault(text, i)
+    contained = KeywordMatcher(long_index)
 
     for entry in redlines:
         # The AI result structure (Service Layer)
@@ -191,36 +194,39 @@ def apply_redlines_to_docx(
         if not original_text: continue
 
         # 1. Find the target paragraph
-        # We look for the paragraph that contains the 'original_text' 
-        # (or at least a significant part of it, in case of Stitching)
-        
-        target_para = None
-        best_score = 0.0
-
-        for p_entry in para_map:
-            # Exact match check
-            if p_entry["text"] == original_text:
-                target_para = p_entry["obj"]
-                break
-            
-            # Substring check (if the original_text was a stitched chunk, 
-            # the paragraph might be just the body)
-            if len(p_entry["text"]) > 50 and p_entry["text"] in original_text:
-                target_para = p_entry["obj"]
-                break
-                
+        # The earliest paragraph that equals the 'original_text' or (in case of
+        # Stitching) is a long substring of it wins.
+        hits = contained.payloads(original_text)
+        if original_text in exact_index:
+            hits.add(exact_index[original_text])
+
+        target_para = paras[min(hits)] if hits else None
+
+        if target_para is None:
             # Fuzzy Similarity check (last resort)
-            # This is slow, so we only do it if the paragraph is roughly the same length
-            if abs(len(p_entry["text"]) - len(original_text)) < 50:
-                score = difflib.SequenceMatcher(None, p_entry["text"], original_text).ratio()
-                if score > 0.85 and score > best_score:
+            # This is slow, so we only do it if the paragraph is roughly the same length,
+            # and quick_ratio (an upper bound on ratio) rules most candidates out cheaply
+            best_score = 0.0
+            for i, text in enumerate(texts):
+                if abs(len(text) - len(original_text)) >= 50:
+                    continue
+                sm = difflib.SequenceMatcher(None, text, original_text)
+                floor = max(0.85, best_score)
+                if sm.quick_ratio() <= floor:
+                    continue
+                score = sm.ratio()
+                if score > floor:
                     best_score = score
-                    target_para = p_entry["obj"]
+                    target_para = paras[i]
 
         # 2. Apply
         if target_para:
             apply_deltas_to_paragraph(target_para, delta)
 
+    if out_stream is not None:
+        doc.save(out_stream)
+        return None
+
     buf = io.BytesIO()
     doc.save(buf)
     return buf.getvalue()
\ No newline at end of file
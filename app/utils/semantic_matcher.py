@@ -1,20 +1,64 @@
+import os
+import json
 import hashlib
-from typing import List, Tuple, Dict, Any
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import List, Tuple, Dict, Any, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from app.core.config import settings
 
 # -----------------------------------------------------------
 # 1. Initialize Embedding Model (Singleton)
 # -----------------------------------------------------------
 
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+_EMBED_LOCK = Lock()
 _EMBED_MODEL = None
+_EMBED_VARIANT = ""  # model/device/quantization tag, fixed once the model is loaded
 
-def get_embedder(model_name: str = "all-MiniLM-L6-v2"):
-    global _EMBED_MODEL
+def get_embedder(model_name: str = EMBED_MODEL_NAME):
+    """Locked because startup warmup loads the model in a worker thread alongside requests."""
+    global _EMBED_MODEL, _EMBED_VARIANT
     if _EMBED_MODEL is None:
-        _EMBED_MODEL = SentenceTransformer(model_name)
+        with _EMBED_LOCK:
+            if _EMBED_MODEL is None:
+                model = _load_embedder(model_name)
+                # Model, device and quantization all change the vectors
+                _EMBED_VARIANT = f"{model_name}|{model.device.type}|int8={settings.PHOENIX_EMBED_INT8}|i8store={settings.PHOENIX_MATCH_INT8}"
+                _EMBED_MODEL = model
     return _EMBED_MODEL
 
+def _load_embedder(model_name: str):
+    # Deferred: torch + sentence-transformers add seconds to import time
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Opt-in: the encoder shares the host with the event loop and usually Ollama
+    if settings.EMBED_NUM_THREADS > 0:
+        torch.set_num_threads(settings.EMBED_NUM_THREADS)
+    model = SentenceTransformer(model_name)
+    # Inference only. Grad mode is thread-local and encode() runs on whichever thread
+    # calls it, so freeze the weights instead: no autograd graph is recorded anywhere
+    model.requires_grad_(False)
+    if model.device.type == "cuda":
+        # Tensor-core matmuls; embeddings are cast back to float32 by the callers
+        model = model.to(torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16)
+    elif settings.PHOENIX_EMBED_INT8 and model.device.type == "cpu":
+        # Dynamic quantization (CPU kernels only): int8 weights in every Linear layer, fp32 activations
+        transformer = model[0]
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+def warm_embedder() -> None:
+    """
+    Loads the model and runs one encode at startup so the first request
+    doesn't pay Torch/model initialization.
+    """
+    get_embedder().encode(["warmup"])
+
 # -----------------------------------------------------------
 # 2. Paragraph Processing
 # -----------------------------------------------------------
@@ -29,20 +73,155 @@ def extract_paragraphs(raw_text: str) -> List[str]:
     cleaned = [line.strip() for line in lines if line.strip()]
     return cleaned
 
+@lru_cache(maxsize=4096)
 def paragraph_hash(text: str) -> str:
+    """
+    16-hex-char content key (not cryptographic; used for caching/matching only).
+    Memoized: playbook clauses and repeated boilerplate are hashed on every lookup.
+    """
     if not text:
         return ""
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
 
 # -----------------------------------------------------------
 # 3. Embedding + Similarity Functions
 # -----------------------------------------------------------
 
-def embed_paragraphs(paragraphs: List[str]):
+# PHOENIX_MATCH_INT8: cached embeddings are held as int8 (round(v * 127)), a quarter of
+# the float32 footprint. They are widened back just before the BLAS matmul - numpy has no
+# BLAS path for integer matmul, so scoring in int16 directly would be slower, not faster.
+_I8_SCALE = 127.0
+
+def _pack(embs: np.ndarray) -> np.ndarray:
+    if settings.PHOENIX_MATCH_INT8:
+        return np.round(embs * _I8_SCALE).astype(np.int8)
+    return embs.astype(np.float32, copy=False)
+
+def _unpack(embs: np.ndarray) -> np.ndarray:
+    if embs.dtype == np.int8:
+        return embs.astype(np.float32) * np.float32(1.0 / _I8_SCALE)
+    return embs
+
+# Paragraph embeddings by content hash: re-analyzing the same contract or template
+# skips the encoder for every paragraph it has already seen. Rows live in one
+# preallocated array (allocated on first use); _EMB_INDEX maps hash -> row in LRU
+# order, and an evicted row is reused by the next insert.
+_PARA_EMB_CACHE_MAX = 10000
+_EMB_STORE: Optional[np.ndarray] = None
+_EMB_INDEX: "OrderedDict[str, int]" = OrderedDict()
+_EMB_LOCK = Lock()
+
+def embed_paragraphs(paragraphs: List[str]) -> Optional[np.ndarray]:
+    """
+    L2-normalized float32 embeddings, one row per paragraph in input order.
+    Cache misses are encoded together in a single batched call.
+    """
+    global _EMB_STORE
     if not paragraphs:
         return None
-    model = get_embedder()
-    return model.encode(paragraphs, convert_to_tensor=True)
+
+    keys = [paragraph_hash(p) for p in paragraphs]
+    hit_pos: List[int] = []
+    hit_rows: List[int] = []
+    misses: Dict[str, str] = {}
+    with _EMB_LOCK:
+        for i, (k, p) in enumerate(zip(keys, paragraphs)):
+            row = _EMB_INDEX.get(k)
+            if row is not None:
+                _EMB_INDEX.move_to_end(k)
+                hit_pos.append(i)
+                hit_rows.append(row)
+            else:
+                misses.setdefault(k, p)
+        # Fancy indexing copies: once the lock is released (encode drops the GIL),
+        # another caller may evict and overwrite these rows
+        hit_embs = _EMB_STORE[hit_rows] if hit_rows else None
+
+    if not misses:
+        return _unpack(hit_embs)
+
+    embs = _pack(get_embedder().encode(list(misses.values()), batch_size=64, convert_to_numpy=True, normalize_embeddings=True))
+
+    out = np.empty((len(keys), embs.shape[1]), dtype=embs.dtype)
+    if hit_rows:
+        out[hit_pos] = hit_embs
+    miss_idx = {k: j for j, k in enumerate(misses)}
+    miss_pos = [i for i, k in enumerate(keys) if k in miss_idx]
+    out[miss_pos] = embs[[miss_idx[keys[i]] for i in miss_pos]]
+
+    with _EMB_LOCK:
+        if _EMB_STORE is None:
+            _EMB_STORE = np.empty((_PARA_EMB_CACHE_MAX, embs.shape[1]), dtype=embs.dtype)
+        # Another caller may have stored some of these keys while we were encoding
+        new_keys = [k for k in misses if k not in _EMB_INDEX][-_PARA_EMB_CACHE_MAX:]
+        rows: List[int] = []
+        for k in new_keys:
+            if len(_EMB_INDEX) < _PARA_EMB_CACHE_MAX:
+                row = len(_EMB_INDEX)
+            else:
+                _, row = _EMB_INDEX.popitem(last=False)
+            _EMB_INDEX[k] = row
+            rows.append(row)
+        if rows:
+            _EMB_STORE[rows] = embs[[miss_idx[k] for k in new_keys]]
+
+    return _unpack(out)
+
+# Encoded clause libraries: the standard library is fixed, so it is encoded once
+# rather than on every paragraph lookup. In memory, entries are keyed by the library
+# object (held by the entry, so its id can't be reused) with a size check; pass a new
+# dict rather than editing one in place. On disk, under EMBED_CACHE_DIR, files are
+# named by a content digest so a restart loads (memory-maps) instead of encoding.
+_LIB_CACHE_MAX = 16
+_LIB_CACHE: "OrderedDict[int, Tuple[Dict[str, str], List[str], np.ndarray]]" = OrderedDict()
+
+def _library_digest(library: Dict[str, str]) -> str:
+    get_embedder()  # sets _EMBED_VARIANT
+    return hashlib.sha256((_EMBED_VARIANT + repr(sorted(library.items()))).encode("utf-8")).hexdigest()
+
+def _load_library_from_disk(key: str) -> Optional[Tuple[List[str], np.ndarray]]:
+    base = os.path.join(settings.EMBED_CACHE_DIR, key)
+    try:
+        with open(base + ".keys.json", "r", encoding="utf-8") as f:
+            keys = json.load(f)
+        embs = np.load(base + ".npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return (keys, embs) if len(keys) == len(embs) else None
+
+def _save_library_to_disk(key: str, keys: List[str], embs: np.ndarray) -> None:
+    base = os.path.join(settings.EMBED_CACHE_DIR, key)
+    try:
+        os.makedirs(settings.EMBED_CACHE_DIR, exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees a partial file
+        with open(base + ".tmp.npy", "wb") as f:
+            np.save(f, embs)
+        os.replace(base + ".tmp.npy", base + ".npy")
+        with open(base + ".keys.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+        os.replace(base + ".keys.json.tmp", base + ".keys.json")
+    except OSError as e:
+        print(f"[Embed] Could not persist library embeddings: {e}")
+
+def _library_embeddings(library: Dict[str, str]) -> Tuple[List[str], np.ndarray]:
+    lib_id = id(library)
+    hit = _LIB_CACHE.get(lib_id)
+    if hit is not None and hit[0] is library and len(hit[1]) == len(library):
+        _LIB_CACHE.move_to_end(lib_id)
+        return hit[1], hit[2]
+
+    digest = _library_digest(library)
+    entry = _load_library_from_disk(digest)
+    if entry is None:
+        keys = list(library.keys())
+        embs = get_embedder().encode(list(library.values()), convert_to_numpy=True, normalize_embeddings=True)
+        entry = (keys, _pack(embs))
+        _save_library_to_disk(digest, *entry)
+
+    _LIB_CACHE[lib_id] = (library, *entry)
+    if len(_LIB_CACHE) > _LIB_CACHE_MAX:
+        _LIB_CACHE.popitem(last=False)
+    return entry
 
 def find_best_match_in_library(query_text: str, library: Dict[str, str]) -> Tuple[str, float]:
     """
@@ -52,18 +231,11 @@ def find_best_match_in_library(query_text: str, library: Dict[str, str]) -> Tupl
     if not query_text or not library:
         return ("Unknown", 0.0)
 
-    model = get_embedder()
-    
-    # Encode Query
-    query_emb = model.encode(query_text, convert_to_tensor=True)
-
-    # Encode Library
-    keys = list(library.keys())
-    values = list(library.values())
-    lib_embs = model.encode(values, convert_to_tensor=True)
+    keys, lib_embs = _library_embeddings(library)
 
-    # Compute Cosine Similarity
-    cosine_scores = util.cos_sim(query_emb, lib_embs)[0]
+    # Encode Query (unit length, so the dot product is the cosine similarity)
+    query_emb = embed_paragraphs([query_text])[0]
+    cosine_scores = _unpack(lib_embs) @ query_emb
 
     # Find Best Match
     best_idx = int(cosine_scores.argmax())
@@ -92,25 +264,26 @@ def pairwise_match(
             "similarity": 0.0
         } for cp in cp_paragraphs]
 
-    cp_emb = embed_paragraphs(cp_paragraphs)
-    tp_emb = embed_paragraphs(tp_paragraphs)
-    sim_matrix = util.cos_sim(cp_emb, tp_emb).cpu().numpy()
-    
-    results = []
+    # One encoder pass for both sides; unit-length rows make cosine a single BLAS matmul
+    emb = embed_paragraphs(cp_paragraphs + tp_paragraphs)
+    cp_emb, tp_emb = emb[:len(cp_paragraphs)], emb[len(cp_paragraphs):]
+    sim_matrix = cp_emb @ tp_emb.T
 
-    for i, cp_text in enumerate(cp_paragraphs):
-        row = sim_matrix[i]
-        best_idx = int(np.argmax(row))
-        best_score = float(row[best_idx])
+    best_idx = sim_matrix.argmax(axis=1)
+    best_scores = sim_matrix[np.arange(len(cp_paragraphs)), best_idx]
+    matched = best_scores >= threshold
+
+    tp_hashes = [paragraph_hash(t) for t in tp_paragraphs]
+    results = []
 
-        if best_score >= threshold:
-            tp_text = tp_paragraphs[best_idx]
+    for cp_text, j, score, ok in zip(cp_paragraphs, best_idx.tolist(), best_scores.tolist(), matched.tolist()):
+        if ok:
             results.append({
                 "cp_text": cp_text,
-                "tp_text": tp_text,
+                "tp_text": tp_paragraphs[j],
                 "cp_hash": paragraph_hash(cp_text),
-                "tp_hash": paragraph_hash(tp_text),
-                "similarity": best_score
+                "tp_hash": tp_hashes[j],
+                "similarity": score
             })
         else:
             results.append({
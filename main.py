@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import os
+import asyncio
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.utils.llm_client import get_http_client, close_http_client
+from app.utils.semantic_matcher import warm_embedder
+from app.services.legal_rag import warm_rag_embedding
+from app.services.intake import start_notify_worker, stop_notify_worker
 
 # Import Routers
 from app.routers import legal, intake, contracts, mapper, ui
@@ -13,16 +18,22 @@ from app.routers import admin_local  # NEW
 
 # IP guard middleware
 from app.middleware.ip_guard_middleware import IPGuardMiddleware
+from app.core.ip_guard import start_hit_flusher, stop_hit_flusher
 
-app = FastAPI(title=settings.APP_TITLE)
+app = FastAPI(title=settings.APP_TITLE, default_response_class=ORJSONResponse)
 
 # --- Middleware ---
+# Comma-separated origins; defaults to wildcard. Methods/headers are pinned to what
+# the API actually uses and preflights are cached by browsers for a day.
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # tighten later
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type", "Accept", "Authorization", "X-Admin-Token"],
+    max_age=86400,
 )
 
 app.add_middleware(IPGuardMiddleware)
@@ -65,6 +76,61 @@ async def _startup_banner():
     print("=" * 72 + "\n")
 
 
+# --- Embedding model warmup ---
+def _warm_embedding_models_sync():
+    warm_embedder()
+    warm_rag_embedding()
+
+
+@app.on_event("startup")
+async def _warm_embedding_models():
+    # Heavy imports (torch, chromadb) are deferred; load them in a worker thread
+    # so the server accepts requests immediately while models warm up.
+    loop = asyncio.get_running_loop()
+    app.state.warmup = loop.run_in_executor(None, _warm_embedding_models_sync)
+    app.state.warmup.add_done_callback(_log_warmup_failure)
+
+
+def _log_warmup_failure(fut: asyncio.Future):
+    # Nothing awaits the warmup; surface a failure here instead of losing it.
+    # The first request will retry the load and raise to its caller.
+    if not fut.cancelled() and fut.exception() is not None:
+        print(f"[Startup] Embedding model warmup failed: {fut.exception()!r}")
+
+
+# --- Shared Ollama HTTP client ---
+@app.on_event("startup")
+async def _open_http_client():
+    app.state.http = get_http_client()
+
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    await close_http_client()
+
+
+# --- Intake email notifications ---
+@app.on_event("startup")
+async def _start_notify_worker():
+    start_notify_worker()
+
+
+@app.on_event("shutdown")
+async def _stop_notify_worker():
+    await stop_notify_worker()
+
+
+# --- IP hit stats ---
+@app.on_event("startup")
+async def _start_hit_flusher():
+    start_hit_flusher()
+
+
+@app.on_event("shutdown")
+async def _stop_hit_flusher():
+    stop_hit_flusher()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,41 @@
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import intake
+
+
+def _client(monkeypatch, model_output: dict) -> TestClient:
+    async def fake_generate(*args, **kwargs):
+        return orjson.dumps(model_output).decode()
+
+    monkeypatch.setattr(intake, "call_ollama_generate", fake_generate)
+    app = FastAPI()
+    app.include_router(intake.router, prefix="/api/intake")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("categories", [
+    [{"name": "Privacy"}, True, None, 3, "Contracts"],
+    {"name": "Privacy"},
+    False,
+    None,
+])
+def test_untyped_categories_do_not_500(monkeypatch, categories):
+    client = _client(monkeypatch, {
+        "categories": categories,
+        "priority_label": "High",
+        "priority_score": 7,
+        "summary": {"text": "nested"},
+        "suggested_owner": 42,
+        "learning_opportunities": "one item",
+    })
+    resp = client.post("/api/intake/analyze", json={"email_text": "Please review the attached DPA."})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert all(isinstance(c, str) for c in body["categories"])
+    assert None not in body["categories"]
+    assert isinstance(body["summary"], str)
+    assert body["suggested_owner"] == "42"
+    assert body["learning_opportunities"] == ["one item"]